@@ -0,0 +1,101 @@
+"""Compare requests/sec of the sync and async database paths.
+
+Starts the API once per mode (DATABASE_ASYNC=false/true) against the
+database configured in .env and fires GET /clients/ with high
+concurrency.
+
+    python -m benchmarks.async_vs_sync --requests 5000 --concurrency 200
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from uuid import uuid4
+
+import httpx
+
+
+async def wait_until_online(base_url: str):
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        for _ in range(100):
+            try:
+                await client.get('/')
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError('server did not start')
+
+
+async def authenticate(client: httpx.AsyncClient):
+    email = f'bench-{uuid4().hex}@example.com'
+    await client.post(
+        '/auth/register',
+        json={'name': 'bench', 'email': email, 'password': 'bench'},
+    )
+    response = await client.post(
+        '/auth/login', data={'username': email, 'password': 'bench'}
+    )
+    token = response.json()['access_token']
+    client.headers['Authorization'] = f'Bearer {token}'
+
+
+async def load(base_url: str, total: int, concurrency: int) -> float:
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=60
+    ) as client:
+        await authenticate(client)
+        queue = iter(range(total))
+
+        async def worker():
+            for _ in queue:
+                response = await client.get('/clients/?limit=20')
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return total / (time.perf_counter() - started)
+
+
+def run_mode(async_mode: bool, args) -> float:
+    env = {**os.environ, 'DATABASE_ASYNC': str(async_mode).lower()}
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            '-m',
+            'uvicorn',
+            'src.main:app',
+            '--port',
+            str(args.port),
+            '--log-level',
+            'warning',
+        ],
+        env=env,
+    )
+    base_url = f'http://127.0.0.1:{args.port}'
+    try:
+        asyncio.run(wait_until_online(base_url))
+        return asyncio.run(load(base_url, args.requests, args.concurrency))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--port', type=int, default=8010)
+    args = parser.parse_args()
+
+    for async_mode in (False, True):
+        rps = run_mode(async_mode, args)
+        label = 'async' if async_mode else 'sync'
+        print(f'{label:>5}: {rps:8.1f} req/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Measure the streaming order export.
+
+Runs against the database configured in .env. Seed a large history
+first, for example with the query plan benchmark:
+
+    python -m benchmarks.query_plans --seed --orders 1000000
+    python -m benchmarks.export_orders --format csv
+
+Consumes the same generator GET /orders/export streams from and prints
+throughput and the peak Python memory, which should stay flat however
+many orders are exported.
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from sqlalchemy import create_engine, select
+
+from src.models.order_model import Order
+from src.services import order_export
+from src.services.settings import Settings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--format', choices=sorted(order_export.ENCODERS), default='csv'
+    )
+    parser.add_argument('--limit', type=int, default=None)
+    args = parser.parse_args()
+
+    engine = create_engine(Settings().DATABASE_URL)
+    stmt = select(Order)
+    if args.limit:
+        stmt = stmt.where(
+            Order.id.in_(select(Order.id).order_by(Order.id).limit(args.limit))
+        )
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = chunks = 0
+    for chunk in order_export.stream(engine, stmt, args.format):
+        size += len(chunk)
+        chunks += 1
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+
+    print(
+        f'{size / 2**20:.1f} MiB in {chunks} chunks, {elapsed:.1f}s '
+        f'({size / 2**20 / elapsed:.1f} MiB/s), '
+        f'peak memory {peak / 2**20:.1f} MiB'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""Check that slow image uploads don't stall product creation or other
+requests.
+
+Serves the API in a background thread against the database configured
+in .env, with Cloudinary replaced by a local stand-in that sleeps for
+--delay seconds. Creates --uploads products, polls GET / until their
+images are uploaded by the background queue and reports the creation
+latency, the latency of those unrelated requests and how long the
+images took:
+
+    python -m benchmarks.image_upload --uploads 8 --delay 2
+    python -m benchmarks.image_upload --uploads 8 --delay 2 --blocking
+    python -m benchmarks.image_upload --uploads 8 --delay 2 --same-image
+
+--blocking calls the uploader on the event loop, the way uploads ran
+before the upload pool, for comparison. --same-image sends one image for
+every product, which is uploaded only once. The bytes received and the
+bytes actually uploaded after resizing are reported too.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import threading
+import time
+from io import BytesIO
+from uuid import uuid4
+
+import httpx
+import uvicorn
+from PIL import Image
+
+from src.main import app
+from src.services.image_queue import image_queue
+from src.utils.cloudinary_upload import upload_pool
+
+uploaded = []
+
+
+def slow_uploader(delay: float):
+    def uploader(data, timeout):
+        uploaded.append(len(data))
+        time.sleep(delay)
+        return {'secure_url': f'https://example.com/{uuid4().hex}.png'}
+
+    return uploader
+
+
+async def blocking_run(data: bytes) -> str:
+    return upload_pool.uploader(data, timeout=upload_pool.timeout)[
+        'secure_url'
+    ]
+
+
+async def authenticate(client: httpx.AsyncClient):
+    email = f'bench-{uuid4().hex}@example.com'
+    await client.post(
+        '/auth/register',
+        json={'name': 'bench', 'email': email, 'password': 'bench'},
+    )
+    response = await client.post(
+        '/auth/login', data={'username': email, 'password': 'bench'}
+    )
+    token = response.json()['access_token']
+    client.headers['Authorization'] = f'Bearer {token}'
+
+
+def photo() -> bytes:
+    # random pixels do not compress, close enough to a product photo and
+    # never seen before, so the image index can't skip the upload
+    size = (2400, 1600)
+    buffer = BytesIO()
+    Image.frombytes('L', size, os.urandom(size[0] * size[1])).save(
+        buffer, format='PNG'
+    )
+    return buffer.getvalue()
+
+
+async def create_product(client: httpx.AsyncClient, image: bytes) -> float:
+    started = time.perf_counter()
+    response = await client.post(
+        '/products/',
+        data={
+            'name': 'Bench',
+            'description': 'image upload benchmark',
+            'category': 'bench',
+            'price': 1,
+            'barcode': uuid4().hex,
+            'quantity': 1,
+            'expiration': '01/01/2099',
+        },
+        files={'image': ('bench.png', image, 'image/png')},
+    )
+    response.raise_for_status()
+    return time.perf_counter() - started
+
+
+async def load(base_url: str, images: list[bytes]) -> tuple[list, list]:
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        await authenticate(client)
+        processed = image_queue.processed + len(images)
+        creating = asyncio.gather(
+            *(create_product(client, image) for image in images)
+        )
+
+        latencies = []
+        while not creating.done() or image_queue.processed < processed:
+            started = time.perf_counter()
+            await client.get('/')
+            latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(0.01)
+        return await creating, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--uploads', type=int, default=8)
+    parser.add_argument('--delay', type=float, default=2)
+    parser.add_argument('--blocking', action='store_true')
+    parser.add_argument('--same-image', action='store_true')
+    parser.add_argument('--port', type=int, default=8011)
+    args = parser.parse_args()
+
+    upload_pool.uploader = slow_uploader(args.delay)
+    if args.same_image:
+        images = [photo()] * args.uploads
+    else:
+        images = [photo() for _ in range(args.uploads)]
+    if args.blocking:
+        upload_pool.run = blocking_run
+
+    server = uvicorn.Server(
+        uvicorn.Config(app, port=args.port, log_level='warning')
+    )
+    thread = threading.Thread(target=server.run)
+    thread.start()
+    try:
+        while not server.started:
+            time.sleep(0.05)
+        started = time.perf_counter()
+        creations, latencies = asyncio.run(
+            load(f'http://127.0.0.1:{args.port}', images)
+        )
+        elapsed = time.perf_counter() - started
+    finally:
+        server.should_exit = True
+        thread.join()
+
+    print(
+        f'{args.uploads} products created: '
+        f'median {statistics.median(creations) * 1000:.1f} ms, '
+        f'max {max(creations) * 1000:.1f} ms'
+    )
+    print(
+        f'{args.uploads} images of {args.delay}s uploaded in {elapsed:.1f}s, '
+        f'{len(latencies)} GET / meanwhile: '
+        f'median {statistics.median(latencies) * 1000:.1f} ms, '
+        f'max {max(latencies) * 1000:.1f} ms'
+    )
+    print(
+        f'{sum(map(len, images)) / 2**20:.1f} MiB received, '
+        f'{sum(uploaded) / 2**20:.1f} MiB in {len(uploaded)} uploads'
+    )
+
+
+if __name__ == '__main__':
+    main()
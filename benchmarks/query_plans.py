@@ -0,0 +1,148 @@
+"""Seed the database and check that list/filter queries use indexes.
+
+Runs against the Postgres database configured in .env, after
+`alembic upgrade head`:
+
+    python -m benchmarks.query_plans --seed --orders 1000000
+
+Every query mirrors one issued by the routers; the script prints the
+plan nodes and exits with an error if any of them falls back to a
+sequential scan.
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.dialects import postgresql
+
+from src.models.client_model import Client
+from src.models.order_model import Order, OrderItem, OrderStatus
+from src.models.products_model import Product
+from src.services.settings import Settings
+
+SEED = [
+    """
+    INSERT INTO clients (name, email, cpf)
+    SELECT 'cliente ' || g, 'user' || g || '@example.com',
+           lpad(g::text, 11, '0')
+    FROM generate_series(1, :clients) g
+    """,
+    """
+    INSERT INTO products (name, description, category, price, barcode,
+                          quantity, expiration)
+    SELECT 'produto ' || g, 'descricao', 'categoria ' || (g % 50),
+           100 + g % 1000, lpad(g::text, 13, '0'), 1000,
+           now() + interval '1 year'
+    FROM generate_series(1, :products) g
+    """,
+    """
+    INSERT INTO orders (client_id, total, status, created_at)
+    SELECT 1 + g % :clients, 1000,
+           (ARRAY['PENDING', 'PROCESSING', 'SHIPPED', 'DELIVERED',
+                  'CANCELLED'])[1 + g % 5]::orderstatus,
+           now() - (g % 365) * interval '1 day'
+    FROM generate_series(1, :orders) g
+    """,
+    """
+    INSERT INTO order_items (order_id, product_id, quantity, unit_price)
+    SELECT o.id, 1 + (o.id * i) % :products, i, 500
+    FROM orders o, generate_series(1, 2) i
+    """,
+]
+
+
+def queries():
+    return {
+        'clients by name': select(Client)
+        .where(Client.name.ilike('%cliente 4242%'))
+        .order_by(Client.id)
+        .limit(10),
+        'clients by email': select(Client)
+        .where(Client.email.ilike('%user4242@%'))
+        .order_by(Client.id)
+        .limit(10),
+        'products by category': select(Product)
+        .where(Product.category.ilike('%categoria 7%'))
+        .order_by(Product.id)
+        .limit(10),
+        'product by barcode': select(Product).where(
+            Product.barcode == '0000000004242'
+        ),
+        'orders by client': select(Order)
+        .where(Order.client_id == 4242)
+        .order_by(Order.id.desc())
+        .limit(10),
+        'orders created in range': select(Order).where(
+            Order.created_at.between(
+                datetime.now() - timedelta(days=2),
+                datetime.now() - timedelta(days=1),
+            )
+        ),
+        'open orders in range': select(Order)
+        .where(
+            Order.status.in_([OrderStatus.PENDING, OrderStatus.PROCESSING]),
+            Order.created_at >= datetime.now() - timedelta(days=2),
+            Order.created_at < datetime.now() - timedelta(days=1),
+        )
+        .order_by(Order.id.desc())
+        .limit(10),
+        'items of orders': select(OrderItem).where(
+            OrderItem.order_id.in_(range(1000, 1100))
+        ),
+        'items of product': select(OrderItem).where(
+            OrderItem.product_id == 4242
+        ),
+    }
+
+
+def plan_nodes(plan: dict):
+    yield plan['Node Type'], plan.get('Relation Name')
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seed', action='store_true')
+    parser.add_argument('--clients', type=int, default=100_000)
+    parser.add_argument('--products', type=int, default=200_000)
+    parser.add_argument('--orders', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    engine = create_engine(Settings().DATABASE_URL)
+    if engine.dialect.name != 'postgresql':
+        sys.exit('query plan checks need a postgres DATABASE_URL')
+
+    with engine.begin() as connection:
+        if args.seed:
+            for statement in SEED:
+                connection.execute(text(statement), vars(args))
+        connection.execute(text('ANALYZE'))
+
+    failures = []
+    with engine.connect() as connection:
+        for name, stmt in queries().items():
+            sql = stmt.compile(
+                dialect=postgresql.dialect(),
+                compile_kwargs={'literal_binds': True},
+            )
+            plan = connection.scalar(text(f'EXPLAIN (FORMAT JSON) {sql}'))
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            nodes = list(plan_nodes(plan[0]['Plan']))
+            scans = [
+                f'{node} on {relation}' for node, relation in nodes if relation
+            ]
+            print(f'{name:>24}: {", ".join(scans)}')
+            if any(node == 'Seq Scan' for node, _ in nodes):
+                failures.append(name)
+
+    if failures:
+        sys.exit(f'sequential scans in: {", ".join(failures)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Hammer a single hot product with concurrent orders.
+
+Runs against the database configured in .env, after `alembic upgrade
+head`. Every thread places one-item orders for the same product until
+the stock runs out:
+
+    python -m benchmarks.stock_contention --threads 1 8 32 --stock 5000
+
+With --shards the product keeps its stock in that many counter rows
+(0 is the plain products.quantity column), showing how throughput
+scales with the shard count:
+
+    python -m benchmarks.stock_contention --threads 32 --shards 0 4 16
+
+Prints orders/sec per run and exits with an error if the product was
+oversold or the stock does not match the orders placed.
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from random import randrange
+from uuid import uuid4
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from src.models.client_model import Client
+from src.models.order_model import OrderItem
+from src.models.products_model import Product
+from src.routers.orders_routes import place_order
+from src.schemas.order_schema import OrderCreate, OrderItemCreate
+from src.services import inventory
+from src.services.settings import Settings
+
+
+def seed(engine, stock: int, shards: int) -> tuple[int, int]:
+    with Session(engine) as session:
+        client = Client(
+            name='bench',
+            email=f'bench-{uuid4().hex}@example.com',
+            cpf=f'{randrange(10**11):011d}',
+        )
+        product = Product(
+            name='hot product',
+            description='stock contention benchmark',
+            category='bench',
+            price=100,
+            barcode=uuid4().hex[:13],
+            quantity=stock,
+            expiration=datetime.now() + timedelta(days=365),
+            image=None,
+        )
+        session.add_all([client, product])
+        session.flush()
+        inventory.shard_stock(session, product, shards, stock)
+        session.commit()
+        return client.id, product.id
+
+
+def run(engine, threads: int, stock: int, shards: int) -> tuple[float, int]:
+    client_id, product_id = seed(engine, stock, shards)
+    cart = OrderCreate(
+        client_id=client_id,
+        items=[OrderItemCreate(product_id=product_id, quantity=1)],
+    )
+
+    def worker(_):
+        placed = 0
+        while True:
+            with Session(engine) as session:
+                try:
+                    place_order(session, cart)
+                    session.commit()
+                except HTTPException:
+                    return placed
+            placed += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        placed = sum(executor.map(worker, range(threads)))
+    elapsed = time.perf_counter() - started
+
+    with Session(engine) as session:
+        remaining = session.get(Product, product_id).stock
+        sold = session.scalar(
+            select(func.coalesce(func.sum(OrderItem.quantity), 0)).where(
+                OrderItem.product_id == product_id
+            )
+        )
+    if remaining < 0 or remaining + sold != stock or sold != placed:
+        sys.exit(
+            f'stock mismatch: {stock} in stock, {sold} sold, '
+            f'{remaining} remaining'
+        )
+    return placed / elapsed, placed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--stock', type=int, default=2000)
+    parser.add_argument('--shards', type=int, nargs='+', default=[0])
+    args = parser.parse_args()
+
+    engine = create_engine(
+        Settings().DATABASE_URL, pool_size=max(args.threads), max_overflow=0
+    )
+    for shards in args.shards:
+        for threads in args.threads:
+            rate, placed = run(engine, threads, args.stock, shards)
+            print(
+                f'{shards:>3} shards, {threads:>4} threads: '
+                f'{rate:8.1f} orders/s ({placed} placed)'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -11,6 +11,13 @@ from src.models.auth_model import User
 from src.models.client_model import Client
 from src.models.products_model import Product
 from src.models.order_model import Order, OrderItem
+from src.models.idempotency_model import IdempotencyKey
+from src.models.image_model import ImageIndex
+from src.models.report_model import (
+    CategoryDailySales,
+    ProductDailySales,
+    SalesEvent,
+)
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,69 @@
+"""add unique products barcode
+
+Revision ID: 2c0efeb56cd0
+Revises: 34c0f4463247
+Create Date: 2026-10-18 07:40:56.536384
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2c0efeb56cd0'
+down_revision: Union[str, None] = '34c0f4463247'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not context.is_offline_mode():
+        duplicates = op.get_bind().execute(
+            sa.text(
+                'SELECT barcode FROM products '
+                'GROUP BY barcode HAVING count(*) > 1'
+            )
+        ).scalars().all()
+        if duplicates:
+            raise RuntimeError(
+                f'Products share the same barcode: {", ".join(duplicates)}'
+            )
+
+    # the unique index is built without locking writes and then attached
+    # as the constraint, it also serves the lookups the old index did
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'products_barcode_key',
+            'products',
+            ['barcode'],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+    op.execute(
+        'ALTER TABLE products ADD CONSTRAINT products_barcode_key '
+        'UNIQUE USING INDEX products_barcode_key'
+    )
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_products_barcode',
+            table_name='products',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_products_barcode',
+            'products',
+            ['barcode'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+    op.drop_constraint('products_barcode_key', 'products', type_='unique')
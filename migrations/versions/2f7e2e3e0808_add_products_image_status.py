@@ -0,0 +1,39 @@
+"""add products image status
+
+Revision ID: 2f7e2e3e0808
+Revises: 2c0efeb56cd0
+Create Date: 2026-10-18 07:51:28.532176
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f7e2e3e0808'
+down_revision: Union[str, None] = '2c0efeb56cd0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+image_status = sa.Enum('PENDING', 'READY', 'FAILED', name='imagestatus')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    image_status.create(op.get_bind(), checkfirst=True)
+    op.add_column(
+        'products', sa.Column('image_status', image_status, nullable=True)
+    )
+    # images of existing products were uploaded synchronously
+    op.execute(
+        "UPDATE products SET image_status = 'READY' WHERE image IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('products', 'image_status')
+    image_status.drop(op.get_bind(), checkfirst=True)
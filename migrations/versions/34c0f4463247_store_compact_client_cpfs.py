@@ -0,0 +1,59 @@
+"""store compact client cpfs
+
+Revision ID: 34c0f4463247
+Revises: 3d47bc8f9037
+Create Date: 2026-10-18 07:33:10.953994
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '34c0f4463247'
+down_revision: Union[str, None] = '3d47bc8f9037'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # two spellings of the same cpf would collide on the unique key once
+    # the punctuation is gone, those have to be merged by hand first
+    if not context.is_offline_mode():
+        duplicates = op.get_bind().execute(
+            sa.text(
+                "SELECT regexp_replace(cpf, '[^0-9]', '', 'g') AS digits "
+                'FROM clients GROUP BY digits HAVING count(*) > 1'
+            )
+        ).scalars().all()
+        if duplicates:
+            raise RuntimeError(
+                f'Clients share the same cpf: {", ".join(duplicates)}'
+            )
+
+    op.execute(
+        "UPDATE clients SET cpf = regexp_replace(cpf, '[^0-9]', '', 'g') "
+        "WHERE cpf ~ '[^0-9]'"
+    )
+    op.alter_column(
+        'clients',
+        'cpf',
+        existing_type=sa.String(),
+        type_=sa.String(length=11),
+        existing_nullable=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # the punctuation is not restored, compact cpfs are valid either way
+    op.alter_column(
+        'clients',
+        'cpf',
+        existing_type=sa.String(length=11),
+        type_=sa.String(),
+        existing_nullable=False,
+    )
@@ -0,0 +1,47 @@
+"""add product stock shards
+
+Revision ID: 50c65d53e9f5
+Revises: 97a1ee2b930d
+Create Date: 2026-10-18 07:09:35.935146
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '50c65d53e9f5'
+down_revision: Union[str, None] = '97a1ee2b930d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'products',
+        sa.Column(
+            'stock_shards',
+            sa.Integer(),
+            server_default=sa.text('0'),
+            nullable=False,
+        ),
+    )
+    op.create_table(
+        'product_stock_shards',
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('shard', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['product_id'], ['products.id'], ondelete='CASCADE'
+        ),
+        sa.PrimaryKeyConstraint('product_id', 'shard'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('product_stock_shards')
+    op.drop_column('products', 'stock_shards')
@@ -0,0 +1,51 @@
+"""add sales events and order item categories
+
+Revision ID: 8e1f4c2a9d53
+Revises: bfc041b2069f
+Create Date: 2026-10-18 09:12:41.508313
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e1f4c2a9d53'
+down_revision: Union[str, None] = 'bfc041b2069f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'sales_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('category', sa.String(), nullable=False),
+        sa.Column('revenue', sa.Integer(), nullable=False),
+        sa.Column('units', sa.Integer(), nullable=False),
+        sa.Column('orders', sa.Integer(), nullable=False),
+        sa.Column('category_orders', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    # existing lines take the current category of their product, the
+    # same one the rollups were built with
+    op.add_column(
+        'order_items', sa.Column('category', sa.String(), nullable=True)
+    )
+    op.execute(
+        'UPDATE order_items SET category = products.category '
+        'FROM products WHERE products.id = order_items.product_id'
+    )
+    op.alter_column('order_items', 'category', nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('order_items', 'category')
+    op.drop_table('sales_events')
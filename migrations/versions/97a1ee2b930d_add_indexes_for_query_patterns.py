@@ -0,0 +1,88 @@
+"""add indexes for query patterns
+
+Revision ID: 97a1ee2b930d
+Revises: 43ecf49b5666
+Create Date: 2026-10-18 06:52:40.140018
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '97a1ee2b930d'
+down_revision: Union[str, None] = '43ecf49b5666'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BTREE_INDEXES = [
+    ('ix_orders_client_id', 'orders', 'client_id'),
+    ('ix_orders_status', 'orders', 'status'),
+    ('ix_orders_created_at', 'orders', 'created_at'),
+    ('ix_order_items_order_id', 'order_items', 'order_id'),
+    ('ix_order_items_product_id', 'order_items', 'product_id'),
+    ('ix_products_category', 'products', 'category'),
+    ('ix_products_barcode', 'products', 'barcode'),
+]
+
+# backs the ilike '%term%' searches, only available on postgres
+TRIGRAM_INDEXES = [
+    ('ix_clients_name_trgm', 'clients', 'name'),
+    ('ix_clients_email_trgm', 'clients', 'email'),
+    ('ix_products_category_trgm', 'products', 'category'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    postgres = op.get_bind().dialect.name == 'postgresql'
+    if postgres:
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    # CREATE INDEX CONCURRENTLY can not run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, column in BTREE_INDEXES:
+            op.create_index(
+                name,
+                table,
+                [column],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+        if postgres:
+            for name, table, column in TRIGRAM_INDEXES:
+                op.create_index(
+                    name,
+                    table,
+                    [column],
+                    postgresql_using='gin',
+                    postgresql_ops={column: 'gin_trgm_ops'},
+                    postgresql_concurrently=True,
+                    if_not_exists=True,
+                )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    postgres = op.get_bind().dialect.name == 'postgresql'
+
+    with op.get_context().autocommit_block():
+        if postgres:
+            for name, table, _ in TRIGRAM_INDEXES:
+                op.drop_index(
+                    name,
+                    table_name=table,
+                    postgresql_concurrently=True,
+                    if_exists=True,
+                )
+
+        for name, table, _ in BTREE_INDEXES:
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,44 @@
+"""add image index and product thumbnails
+
+Revision ID: bfc041b2069f
+Revises: 2f7e2e3e0808
+Create Date: 2026-10-18 07:54:23.336270
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bfc041b2069f'
+down_revision: Union[str, None] = '2f7e2e3e0808'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'image_index',
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('url', sa.String(), nullable=False),
+        sa.Column('thumbnail', sa.String(), nullable=False),
+        sa.Column(
+            'created_at',
+            sa.DateTime(),
+            server_default=sa.text('now()'),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint('content_hash'),
+    )
+    op.add_column(
+        'products', sa.Column('thumbnail', sa.String(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('products', 'thumbnail')
+    op.drop_table('image_index')
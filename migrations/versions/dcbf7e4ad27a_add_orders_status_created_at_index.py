@@ -0,0 +1,56 @@
+"""add orders status created_at index
+
+Revision ID: dcbf7e4ad27a
+Revises: 5b26c3707876
+Create Date: 2026-10-18 07:17:22.052537
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'dcbf7e4ad27a'
+down_revision: Union[str, None] = '5b26c3707876'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # the composite index covers status-only lookups as well, so the
+    # single column one is dropped
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_orders_status_created_at',
+            'orders',
+            ['status', 'created_at'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_orders_status',
+            table_name='orders',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_orders_status',
+            'orders',
+            ['status'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_orders_status_created_at',
+            table_name='orders',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,30 @@
+"""Rebuild the daily sales rollups from the existing orders.
+
+Recomputes every day, or only the period given by --from/--to:
+
+    python -m src.commands.backfill_sales_rollups
+    python -m src.commands.backfill_sales_rollups --from 2025-01-01
+"""
+
+import argparse
+from datetime import date
+
+from sqlalchemy.orm import Session
+
+from src.services.database import engine
+from src.services.sales_rollup import backfill
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--from', dest='date_from', type=date.fromisoformat)
+    parser.add_argument('--to', dest='date_to', type=date.fromisoformat)
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        backfill(session, args.date_from, args.date_to)
+    print('sales rollups rebuilt')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""Import clients from a CSV file.
+
+The CSV has a header with name, email and cpf columns:
+
+    python -m src.commands.import_clients clients.csv
+
+Rejected rows are printed with their line number and errors.
+"""
+
+import argparse
+
+from sqlalchemy.orm import Session
+
+from src.services.client_import import import_clients
+from src.services.database import engine
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('path')
+    args = parser.parse_args()
+
+    with (
+        open(args.path, encoding='utf-8-sig', newline='') as lines,
+        Session(engine) as session,
+    ):
+        report = import_clients(session, lines)
+
+    for row in report['rejected']:
+        print(f'line {row["line"]}: {"; ".join(row["errors"])}')
+    print(
+        f'{report["imported"]} clients imported, '
+        f'{len(report["rejected"])} rejected'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""Import a product catalog from a CSV file.
+
+The CSV has a header with name, description, category, price, barcode,
+quantity, expiration (dd/mm/yyyy) and an optional image column:
+
+    python -m src.commands.import_products catalog.csv
+
+Rejected rows are printed with their line number and errors.
+"""
+
+import argparse
+
+from sqlalchemy.orm import Session
+
+from src.services.database import engine
+from src.services.product_import import import_products
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('path')
+    args = parser.parse_args()
+
+    with (
+        open(args.path, encoding='utf-8-sig', newline='') as lines,
+        Session(engine) as session,
+    ):
+        report = import_products(session, lines)
+
+    for row in report['rejected']:
+        print(f'line {row["line"]}: {"; ".join(row["errors"])}')
+    print(
+        f'{report["imported"]} products imported, '
+        f'{len(report["rejected"])} rejected'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,20 @@
+"""Delete stored Idempotency-Key responses past their TTL.
+
+Meant to run periodically (cron or a scheduled job):
+
+    python -m src.commands.purge_idempotency_keys
+"""
+
+from sqlalchemy.orm import Session
+
+from src.services.database import engine
+from src.services.idempotency import purge_expired
+
+
+def main():
+    with Session(engine) as session:
+        print(f'{purge_expired(session)} expired idempotency keys removed')
+
+
+if __name__ == '__main__':
+    main()
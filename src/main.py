@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from http import HTTPStatus
 
 from fastapi import FastAPI
@@ -6,11 +7,33 @@ from fastapi.middleware.cors import CORSMiddleware
 from src.routers import (
     auth_routes,
     client_routes,
+    metrics_routes,
     orders_routes,
     products_routes,
+    reports_routes,
 )
+from src.services.hashing import hashing_pool
+from src.services.image_queue import image_queue
+from src.services.sales_rollup import rollup_folder
+from src.utils import cloudinary_init
+from src.utils.cloudinary_upload import upload_pool
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    hashing_pool.start()
+    cloudinary_init()
+    upload_pool.start()
+    image_queue.start()
+    rollup_folder.start()
+    yield
+    await rollup_folder.stop()
+    await image_queue.stop()
+    upload_pool.shutdown()
+    hashing_pool.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 origins = ['*']
 
 app.add_middleware(
@@ -24,6 +47,8 @@ app.include_router(auth_routes.router)
 app.include_router(client_routes.router)
 app.include_router(products_routes.router)
 app.include_router(orders_routes.router)
+app.include_router(metrics_routes.router)
+app.include_router(reports_routes.router)
 
 
 @app.get('/', status_code=HTTPStatus.OK)
@@ -1,3 +1,13 @@
+from sqlalchemy import MetaData
 from sqlalchemy.orm import registry
 
-table_registry = registry()
+# the names postgres gives unnamed unique constraints, errors are mapped
+# back to messages by them
+table_registry = registry(
+    metadata=MetaData(
+        naming_convention={
+            'ix': 'ix_%(column_0_label)s',
+            'uq': '%(table_name)s_%(column_0_name)s_key',
+        }
+    )
+)
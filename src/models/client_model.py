@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import func
+from sqlalchemy import Index, String, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from . import table_registry
@@ -9,11 +9,26 @@ from . import table_registry
 @table_registry.mapped_as_dataclass
 class Client:
     __tablename__ = 'clients'
+    __table_args__ = (
+        Index(
+            'ix_clients_name_trgm',
+            'name',
+            postgresql_using='gin',
+            postgresql_ops={'name': 'gin_trgm_ops'},
+        ),
+        Index(
+            'ix_clients_email_trgm',
+            'email',
+            postgresql_using='gin',
+            postgresql_ops={'email': 'gin_trgm_ops'},
+        ),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     name: Mapped[str] = mapped_column(nullable=False)
     email: Mapped[str] = mapped_column(unique=True)
-    cpf: Mapped[str] = mapped_column(unique=True)
+    # the 11 digits only, see src.utils.cpf_validator.clean_cpf
+    cpf: Mapped[str] = mapped_column(String(11), unique=True)
     created_at: Mapped[datetime] = mapped_column(
         init=False, server_default=func.now()
     )
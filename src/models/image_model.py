@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from sqlalchemy import String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from . import table_registry
+
+
+@table_registry.mapped_as_dataclass
+class ImageIndex:
+    __tablename__ = 'image_index'
+
+    # sha256 of the uploaded bytes, identical images are stored once
+    content_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    url: Mapped[str] = mapped_column(nullable=False)
+    thumbnail: Mapped[str] = mapped_column(nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        init=False, server_default=func.now()
+    )
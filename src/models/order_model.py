@@ -2,7 +2,7 @@ from datetime import datetime
 from enum import Enum
 
 from sqlalchemy import Enum as SqlEnum
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import ForeignKey, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from . import table_registry
@@ -16,23 +16,38 @@ class OrderStatus(str, Enum):
     CANCELLED = 'canceled'
 
 
+# delivered and cancelled orders are final
+ORDER_TRANSITIONS = {
+    OrderStatus.PENDING: {OrderStatus.PROCESSING, OrderStatus.CANCELLED},
+    OrderStatus.PROCESSING: {OrderStatus.SHIPPED, OrderStatus.CANCELLED},
+    OrderStatus.SHIPPED: {OrderStatus.DELIVERED},
+    OrderStatus.DELIVERED: set(),
+    OrderStatus.CANCELLED: set(),
+}
+
+
 @table_registry.mapped_as_dataclass
 class Order:
     __tablename__ = 'orders'
+    __table_args__ = (
+        Index('ix_orders_status_created_at', 'status', 'created_at'),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     client_id: Mapped[int] = mapped_column(
-        ForeignKey('clients.id'), nullable=False
+        ForeignKey('clients.id'), nullable=False, index=True
     )
     total: Mapped[int] = mapped_column(nullable=False)
     items: Mapped[list['OrderItem']] = relationship(
-        back_populates='order', cascade='all, delete-orphan'
+        back_populates='order', cascade='all, delete-orphan', lazy='selectin'
     )
     status: Mapped[OrderStatus] = mapped_column(
-        SqlEnum(OrderStatus), nullable=False, default=OrderStatus.PENDING
+        SqlEnum(OrderStatus),
+        nullable=False,
+        default=OrderStatus.PENDING,
     )
     created_at: Mapped[datetime] = mapped_column(
-        init=False, server_default=func.now()
+        init=False, server_default=func.now(), index=True
     )
     updated_at: Mapped[datetime] = mapped_column(
         init=False, server_default=func.now(), onupdate=func.now()
@@ -45,12 +60,15 @@ class OrderItem:
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     order_id: Mapped[int] = mapped_column(
-        ForeignKey('orders.id'), nullable=False
+        ForeignKey('orders.id'), nullable=False, index=True
     )
     product_id: Mapped[int] = mapped_column(
-        ForeignKey('products.id'), nullable=False
+        ForeignKey('products.id'), nullable=False, index=True
     )
     quantity: Mapped[int] = mapped_column(nullable=False)
     unit_price: Mapped[int] = mapped_column(nullable=False)
+    # the product category when the order was placed, sales stay in it
+    # if the product moves to another category
+    category: Mapped[str] = mapped_column(nullable=False)
 
     order: Mapped['Order'] = relationship(back_populates='items', init=False)
@@ -1,27 +1,89 @@
 from datetime import datetime
+from enum import Enum
+from typing import Optional
 
-from sqlalchemy import func
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Enum as SqlEnum
+from sqlalchemy import ForeignKey, Index, case, func, select
+from sqlalchemy.orm import Mapped, column_property, mapped_column
 
 from . import table_registry
 
 
+class ImageStatus(str, Enum):
+    PENDING = 'pending'
+    READY = 'ready'
+    FAILED = 'failed'
+
+
 @table_registry.mapped_as_dataclass
 class Product:
     __tablename__ = 'products'
+    __table_args__ = (
+        Index(
+            'ix_products_category_trgm',
+            'category',
+            postgresql_using='gin',
+            postgresql_ops={'category': 'gin_trgm_ops'},
+        ),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     name: Mapped[str] = mapped_column(nullable=False)
     description: Mapped[str] = mapped_column(nullable=True)
-    category: Mapped[str] = mapped_column(nullable=False)
+    category: Mapped[str] = mapped_column(nullable=False, index=True)
     price: Mapped[int] = mapped_column(nullable=False)
-    barcode: Mapped[str] = mapped_column(nullable=False)
+    barcode: Mapped[str] = mapped_column(nullable=False, unique=True)
     quantity: Mapped[int] = mapped_column(nullable=False)
     expiration: Mapped[datetime] = mapped_column(nullable=False)
     image: Mapped[str] = mapped_column(nullable=True)
+    # None when the product was created without an image
+    image_status: Mapped[Optional[ImageStatus]] = mapped_column(
+        SqlEnum(ImageStatus), nullable=True, default=None
+    )
+    thumbnail: Mapped[Optional[str]] = mapped_column(
+        nullable=True, default=None
+    )
+    stock_shards: Mapped[int] = mapped_column(
+        init=False, default=0, server_default='0'
+    )
     created_at: Mapped[datetime] = mapped_column(
         init=False, server_default=func.now()
     )
     updated_at: Mapped[datetime] = mapped_column(
         init=False, server_default=func.now(), onupdate=func.now()
     )
+
+
+@table_registry.mapped_as_dataclass
+class ProductStockShard:
+    __tablename__ = 'product_stock_shards'
+
+    product_id: Mapped[int] = mapped_column(
+        ForeignKey('products.id', ondelete='CASCADE'), primary_key=True
+    )
+    shard: Mapped[int] = mapped_column(primary_key=True)
+    quantity: Mapped[int] = mapped_column(nullable=False)
+
+
+# sharded products keep their stock in product_stock_shards, so the
+# available stock is the sum of the shards instead of products.quantity
+Product.__mapper__.add_property(
+    'stock',
+    column_property(
+        case(
+            (
+                Product.stock_shards > 0,
+                select(func.coalesce(func.sum(ProductStockShard.quantity), 0))
+                .where(ProductStockShard.product_id == Product.id)
+                .correlate_except(ProductStockShard)
+                .scalar_subquery(),
+            ),
+            else_=Product.quantity,
+        )
+    ),
+)
+
+# lists link the thumbnail, products imported with an image url have none
+Product.__mapper__.add_property(
+    'preview', column_property(func.coalesce(Product.thumbnail, Product.image))
+)
@@ -0,0 +1,46 @@
+from datetime import date
+
+from sqlalchemy.orm import Mapped, mapped_column
+
+from . import table_registry
+
+
+@table_registry.mapped_as_dataclass
+class ProductDailySales:
+    __tablename__ = 'product_daily_sales'
+
+    day: Mapped[date] = mapped_column(primary_key=True)
+    product_id: Mapped[int] = mapped_column(primary_key=True)
+    revenue: Mapped[int] = mapped_column(nullable=False)
+    units: Mapped[int] = mapped_column(nullable=False)
+    orders: Mapped[int] = mapped_column(nullable=False)
+
+
+@table_registry.mapped_as_dataclass
+class CategoryDailySales:
+    __tablename__ = 'category_daily_sales'
+
+    day: Mapped[date] = mapped_column(primary_key=True)
+    category: Mapped[str] = mapped_column(primary_key=True)
+    revenue: Mapped[int] = mapped_column(nullable=False)
+    units: Mapped[int] = mapped_column(nullable=False)
+    orders: Mapped[int] = mapped_column(nullable=False)
+
+
+@table_registry.mapped_as_dataclass
+class SalesEvent:
+    # one row per order and product, appended when an order is created
+    # (positive measures) or cancelled (negative) and folded into the
+    # daily tables in the background
+    __tablename__ = 'sales_events'
+
+    id: Mapped[int] = mapped_column(init=False, primary_key=True)
+    order_id: Mapped[int] = mapped_column(nullable=False)
+    day: Mapped[date] = mapped_column(nullable=False)
+    product_id: Mapped[int] = mapped_column(nullable=False)
+    category: Mapped[str] = mapped_column(nullable=False)
+    revenue: Mapped[int] = mapped_column(nullable=False)
+    units: Mapped[int] = mapped_column(nullable=False)
+    orders: Mapped[int] = mapped_column(nullable=False)
+    # the order counts once per category, on its first product there
+    category_orders: Mapped[int] = mapped_column(nullable=False)
@@ -4,40 +4,60 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from src.models.auth_model import User
 from src.schemas.auth_schema import Token
 from src.schemas.user_schema import CreateUser, PublicUser
-from src.services.database import get_session
+from src.services.database import get_session, run_sync, run_with_session
+from src.services.hashing import check_password, hash_password
+from src.services.integrity import unique_violation
+from src.services.principal_cache import Principal
+from src.services.revocation import token_revocations
 from src.services.security import (
     create_access_token,
     get_current_user,
-    get_password_hash,
-    verify_password,
+    token_claims,
 )
 
 router = APIRouter(prefix='/auth', tags=['Authentication'])
 
 # types
-T_CurrentUser = Annotated[User, Depends(get_current_user)]
+T_CurrentUser = Annotated[Principal, Depends(get_current_user)]
 T_Session = Annotated[Session, Depends(get_session)]
 T_OAuth2Form = Annotated[OAuth2PasswordRequestForm, Depends()]
 
+USER_CONSTRAINTS = {'users_email_key': 'Email already registered'}
+
+
+async def check_email(session: Session, email: str) -> None:
+    # checked before hashing so a duplicate never takes a slot in the
+    # hashing pool, the unique constraint still covers concurrent requests
+    if await run_sync(
+        session, Session.scalar, select(User.id).where(User.email == email)
+    ):
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=USER_CONSTRAINTS['users_email_key'],
+        )
+
 
 @router.post('/login', response_model=Token)
-def login_for_access_token(form_data: T_OAuth2Form, session: T_Session):
-    user = session.scalar(
+async def login_for_access_token(form_data: T_OAuth2Form, session: T_Session):
+    user = await run_sync(
+        session,
+        Session.scalar,
         select(User).where(User.email == form_data.username),
     )
 
-    if not user or not verify_password(form_data.password, user.password):
+    if not user or not await check_password(form_data.password, user.password):
         raise HTTPException(
             status_code=HTTPStatus.BAD_REQUEST,
             detail='Incorrect email or password',
         )
 
-    access_token = create_access_token(data={'sub': user.email})
+    access_token = create_access_token(data=token_claims(user))
     return {'access_token': access_token, 'token_type': 'Bearer'}
 
 
@@ -46,25 +66,21 @@ def login_for_access_token(form_data: T_OAuth2Form, session: T_Session):
     status_code=HTTPStatus.CREATED,
     response_model=PublicUser,
 )
-def create_normal_user(user: CreateUser, session: T_Session):
-    db_user = session.scalar(
-        select(User).where(User.email == user.email),
-    )
-    if db_user:
-        raise HTTPException(
-            status_code=HTTPStatus.BAD_REQUEST,
-            detail='Email already registered',
-        )
-
+async def create_normal_user(user: CreateUser, session: T_Session):
+    await check_email(session, user.email)
     db_user = User(
         name=user.name,
         email=user.email,
         profile='normal',
-        password=get_password_hash(user.password),
+        password=await hash_password(user.password),
     )
     session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
+    try:
+        await run_sync(session, Session.commit)
+    except IntegrityError as error:
+        await run_sync(session, Session.rollback)
+        unique_violation(error, USER_CONSTRAINTS)
+    await run_sync(session, Session.refresh, db_user)
     return db_user
 
 
@@ -73,29 +89,41 @@ def create_normal_user(user: CreateUser, session: T_Session):
     status_code=HTTPStatus.CREATED,
     response_model=PublicUser,
 )
-def create_admin_user(user: CreateUser, session: T_Session):
-    db_user = session.scalar(
-        select(User).where(User.email == user.email),
-    )
-    if db_user:
-        raise HTTPException(
-            status_code=HTTPStatus.BAD_REQUEST,
-            detail='Email already registered',
-        )
-
+async def create_admin_user(user: CreateUser, session: T_Session):
+    await check_email(session, user.email)
     db_user = User(
         name=user.name,
         email=user.email,
         profile='admin',
-        password=get_password_hash(user.password),
+        password=await hash_password(user.password),
     )
     session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
+    try:
+        await run_sync(session, Session.commit)
+    except IntegrityError as error:
+        await run_sync(session, Session.rollback)
+        unique_violation(error, USER_CONSTRAINTS)
+    await run_sync(session, Session.refresh, db_user)
     return db_user
 
 
 @router.post('/refresh-token', response_model=Token)
 def refresh_access_token(user: T_CurrentUser):
-    new_access_token = create_access_token(data={'sub': user.email})
+    new_access_token = create_access_token(data=token_claims(user))
     return {'access_token': new_access_token, 'token_type': 'Bearer'}
+
+
+@router.post('/revoke-tokens', status_code=HTTPStatus.NO_CONTENT)
+@run_with_session
+def revoke_access_tokens(user: T_CurrentUser, session: T_Session):
+    db_user = session.get(User, user.id)
+    if not db_user:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail='User not found'
+        )
+
+    db_user.token_version = User.token_version + 1
+    session.commit()
+    token_revocations.bump(db_user.id, db_user.token_version)
+
+    return
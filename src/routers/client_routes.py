@@ -1,32 +1,55 @@
 from http import HTTPStatus
+from io import TextIOWrapper
 from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from src.models.auth_model import User
 from src.models.client_model import Client
 from src.schemas.client_schema import CreateClient, ListClients, PublicClient
-from src.services.database import get_session
+from src.schemas.import_schema import ImportReport
+from src.services import client_import
+from src.services.database import (
+    get_read_session,
+    get_session,
+    run_with_session,
+)
+from src.services.integrity import unique_violation
+from src.services.principal_cache import Principal
 from src.services.security import get_current_user
 from src.utils.cpf_validator import clean_cpf, validate_cpf
+from src.utils.pagination import keyset_page
 
 router = APIRouter(prefix='/clients', tags=['Clients'])
 
 # types
-T_CurrentUser = Annotated[User, Depends(get_current_user)]
+T_CurrentUser = Annotated[Principal, Depends(get_current_user)]
 T_Session = Annotated[Session, Depends(get_session)]
+T_ReadSession = Annotated[Session, Depends(get_read_session)]
+
+CREATE_CONSTRAINTS = {
+    'clients_email_key': 'Email already exists',
+    'clients_cpf_key': 'CPF already exists',
+}
+UPDATE_CONSTRAINTS = {
+    'clients_email_key': 'Email already registered by another user',
+    'clients_cpf_key': 'CPF already registered by another user',
+}
 
 
 @router.get('/', status_code=HTTPStatus.OK, response_model=ListClients)
+@run_with_session
 def see_all_clients(
     current_user: T_CurrentUser,
-    session: T_Session,
+    session: T_ReadSession,
     limit: int = 10,
     skip: int = 0,
     name: Optional[str] = Query(None),
     email: Optional[str] = Query(None),
+    after: Optional[str] = Query(None),
+    before: Optional[str] = Query(None),
 ):
     stmt = select(Client)
 
@@ -35,56 +58,56 @@ def see_all_clients(
     if email:
         stmt = stmt.where(Client.email.ilike(f'%{email}%'))
 
-    stmt = stmt.offset(skip).limit(limit).order_by(Client.id)
-    clients = session.scalars(stmt).all()
+    page = keyset_page(session, stmt, Client.id, limit, skip, after, before)
 
-    return {'clients': clients}
+    return {
+        'clients': page.items,
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+    }
 
 
 @router.post('/', status_code=HTTPStatus.CREATED, response_model=PublicClient)
+@run_with_session
 def create_client(
     client: CreateClient,
     current_user: T_CurrentUser,
     session: T_Session,
 ):
-    cleaned_cpf = clean_cpf(client.cpf)
-    valid_cpf = validate_cpf(cleaned_cpf)
-    if not valid_cpf:
+    cpf = clean_cpf(client.cpf)
+    if not validate_cpf(cpf):
         raise HTTPException(
             status_code=HTTPStatus.BAD_REQUEST,
             detail='Invalid CPF',
         )
 
-    db_client = session.scalar(
-        select(Client).where(
-            (Client.email == client.email) | (Client.cpf == client.cpf)
-        )
-    )
-
-    if db_client:
-        if db_client.email == client.email:
-            raise HTTPException(
-                status_code=HTTPStatus.BAD_REQUEST,
-                detail='Email already exists',
-            )
-
-        if db_client.cpf == client.cpf:
-            raise HTTPException(
-                status_code=HTTPStatus.BAD_REQUEST,
-                detail='CPF already exists',
-            )
-
-    db_client = Client(name=client.name, email=client.email, cpf=client.cpf)
+    db_client = Client(name=client.name, email=client.email, cpf=cpf)
     session.add(db_client)
-    session.commit()
+    try:
+        session.commit()
+    except IntegrityError as error:
+        session.rollback()
+        unique_violation(error, CREATE_CONSTRAINTS)
     session.refresh(db_client)
     return db_client
 
 
+@router.post('/import', status_code=HTTPStatus.OK, response_model=ImportReport)
+@run_with_session
+def import_clients(
+    current_user: T_CurrentUser,
+    session: T_Session,
+    file: UploadFile = File(...),
+):
+    lines = TextIOWrapper(file.file, encoding='utf-8-sig', newline='')
+    return client_import.import_clients(session, lines)
+
+
 @router.get('/{client_id}', response_model=PublicClient)
+@run_with_session
 def get_one_client(
     current_user: T_CurrentUser,
-    session: T_Session,
+    session: T_ReadSession,
     client_id: int,
 ):
     client = session.scalar(
@@ -101,15 +124,15 @@ def get_one_client(
 
 
 @router.put('/{client_id}', response_model=PublicClient)
+@run_with_session
 def update_user(
     current_user: T_CurrentUser,
     session: T_Session,
     client_id: int,
     client: CreateClient,
 ):
-    cleaned_cpf = clean_cpf(client.cpf)
-    valid_cpf = validate_cpf(cleaned_cpf)
-    if not valid_cpf:
+    cpf = clean_cpf(client.cpf)
+    if not validate_cpf(cpf):
         raise HTTPException(
             status_code=HTTPStatus.BAD_REQUEST,
             detail='Invalid CPF',
@@ -121,34 +144,21 @@ def update_user(
             status_code=HTTPStatus.NOT_FOUND, detail='User not found'
         )
 
-    email_already_registered = session.scalar(
-        select(Client).where(Client.email == client.email),
-    )
-    if email_already_registered and email_already_registered.id != client_id:
-        raise HTTPException(
-            status_code=HTTPStatus.BAD_REQUEST,
-            detail='Email already registered by another user',
-        )
-
-    cpf_already_registered = session.scalar(
-        select(Client).where(Client.cpf == client.cpf),
-    )
-    if cpf_already_registered and cpf_already_registered.id != client_id:
-        raise HTTPException(
-            status_code=HTTPStatus.BAD_REQUEST,
-            detail='CPF already registered by another user',
-        )
-
     db_client.name = client.name
     db_client.email = client.email
-    db_client.cpf = client.cpf
-    session.commit()
+    db_client.cpf = cpf
+    try:
+        session.commit()
+    except IntegrityError as error:
+        session.rollback()
+        unique_violation(error, UPDATE_CONSTRAINTS)
     session.refresh(db_client)
 
     return db_client
 
 
 @router.delete('/{client_id}', status_code=HTTPStatus.NO_CONTENT)
+@run_with_session
 def delete_user(
     current_user: T_CurrentUser,
     session: T_Session,
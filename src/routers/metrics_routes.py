@@ -0,0 +1,35 @@
+from http import HTTPStatus
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from src.services.hashing import hashing_pool
+from src.services.image_queue import image_queue
+from src.services.pool_metrics import pool_metrics
+from src.services.principal_cache import Principal, principal_cache
+from src.services.sales_rollup import rollup_folder
+from src.services.security import get_current_user
+from src.utils.cloudinary_upload import upload_pool
+
+router = APIRouter(prefix='/metrics', tags=['Metrics'])
+
+# types
+T_CurrentUser = Annotated[Principal, Depends(get_current_user)]
+
+
+@router.get('/', status_code=HTTPStatus.OK)
+def get_metrics(current_user: T_CurrentUser):
+    if current_user.profile != 'admin':
+        raise HTTPException(
+            status_code=HTTPStatus.FORBIDDEN,
+            detail='Not enough permission',
+        )
+
+    return {
+        'database_pools': pool_metrics.snapshot(),
+        'principal_cache': principal_cache.stats(),
+        'hashing_pool': hashing_pool.stats(),
+        'upload_pool': upload_pool.stats(),
+        'image_queue': image_queue.stats(),
+        'sales_rollups': rollup_folder.stats(),
+    }
@@ -1,99 +1,330 @@
+from collections import Counter
+from datetime import datetime
+from enum import Enum
 from http import HTTPStatus
 from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, func, insert, select, update
+from sqlalchemy.orm import Session, joinedload, selectinload
 
-from src.models.auth_model import User
-from src.models.order_model import Order, OrderItem, OrderStatus
+from src.models.client_model import Client
+from src.models.order_model import (
+    ORDER_TRANSITIONS,
+    Order,
+    OrderItem,
+    OrderStatus,
+)
 from src.models.products_model import Product
 from src.schemas.order_schema import (
+    BulkOrderCreate,
+    BulkOrderOutput,
     ListOrders,
     OrderCreate,
     OrderOutput,
+    OrderStatusBulkOutput,
+    OrderStatusBulkUpdate,
     OrderUpdate,
 )
-from src.services.database import get_session
+from src.services import (
+    idempotency,
+    inventory,
+    order_export,
+    sales_rollup,
+)
+from src.services.database import (
+    get_read_session,
+    get_session,
+    run_with_session,
+)
+from src.services.principal_cache import Principal
 from src.services.security import get_current_user
+from src.utils.pagination import keyset_page
 
 router = APIRouter(prefix='/orders', tags=['Orders'])
 
 # types
-T_CurrentUser = Annotated[User, Depends(get_current_user)]
+T_CurrentUser = Annotated[Principal, Depends(get_current_user)]
 T_Session = Annotated[Session, Depends(get_session)]
+T_ReadSession = Annotated[Session, Depends(get_read_session)]
+T_IdempotencyKey = Annotated[Optional[str], Header(max_length=255)]
+
+
+class ExportFormat(str, Enum):
+    CSV = 'csv'
+    NDJSON = 'ndjson'
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.CSV: 'text/csv',
+    ExportFormat.NDJSON: 'application/x-ndjson',
+}
+
+
+def order_output(order: Order) -> OrderOutput:
+    # totals are stored in cents, changing the mapped instance instead
+    # would flush the converted value on the next autoflush
+    return OrderOutput.model_validate(order, from_attributes=True).model_copy(
+        update={'total': order.total / 100}
+    )
+
+
+def parse_statuses(value: str) -> list[OrderStatus]:
+    # status=pending,processing matches either status
+    try:
+        return [
+            OrderStatus(status.strip().lower())
+            for status in value.split(',')
+            if status.strip()
+        ]
+    except ValueError:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=f'Invalid status, use one of: '
+            f'{", ".join(status.value for status in OrderStatus)}',
+        )
+
+
+def filter_orders(
+    stmt: Select,
+    client_id: Optional[int],
+    status: Optional[str],
+    created_from: Optional[datetime],
+    created_to: Optional[datetime],
+) -> Select:
+    if client_id:
+        stmt = stmt.where(Order.client_id == client_id)
+    if status:
+        stmt = stmt.where(Order.status.in_(parse_statuses(status)))
+    if created_from:
+        stmt = stmt.where(Order.created_at >= created_from)
+    if created_to:
+        stmt = stmt.where(Order.created_at < created_to)
+    return stmt
 
 
 @router.get('/', status_code=HTTPStatus.OK, response_model=ListOrders)
+@run_with_session
 def get_all_orders(
     current_user: T_CurrentUser,
-    session: T_Session,
+    session: T_ReadSession,
     order_id: Optional[int] = Query(None),
     client_id: Optional[int] = Query(None),
     status: Optional[str] = Query(None),
+    created_from: Optional[datetime] = Query(None),
+    created_to: Optional[datetime] = Query(None),
     limit: int = 10,
     skip: int = 0,
+    after: Optional[str] = Query(None),
+    before: Optional[str] = Query(None),
 ):
-    stmt = select(Order)
-
+    # one extra query loads the items of the whole page
+    stmt = filter_orders(
+        select(Order).options(selectinload(Order.items)),
+        client_id,
+        status,
+        created_from,
+        created_to,
+    )
     if order_id:
         stmt = stmt.where(Order.id == order_id)
-    if client_id:
-        stmt = stmt.where(Order.client_id == client_id)
-    if status:
-        stmt = stmt.where(Order.status.ilike(f'%{status}%'))
 
-    stmt = stmt.offset(skip).limit(limit).order_by(Order.id.desc())
-    orders = session.scalars(stmt).all()
+    page = keyset_page(
+        session, stmt, Order.id, limit, skip, after, before, descending=True
+    )
 
-    return {'orders': orders}
+    return {
+        'orders': page.items,
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+    }
+
+
+@router.get('/export', status_code=HTTPStatus.OK)
+def export_orders(
+    current_user: T_CurrentUser,
+    session: T_ReadSession,
+    export_format: ExportFormat = Query(ExportFormat.CSV, alias='format'),
+    client_id: Optional[int] = Query(None),
+    status: Optional[str] = Query(None),
+    created_from: Optional[datetime] = Query(None),
+    created_to: Optional[datetime] = Query(None),
+):
+    # rows are streamed from a server side cursor as they are encoded,
+    # memory stays flat whatever the size of the export
+    stmt = filter_orders(
+        select(Order), client_id, status, created_from, created_to
+    )
+    return StreamingResponse(
+        order_export.stream(session.bind, stmt, export_format.value),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            'Content-Disposition': (
+                f'attachment; filename="orders.{export_format.value}"'
+            )
+        },
+    )
+
+
+def load_products(
+    session: Session, orders: list[OrderCreate], lock: bool = False
+) -> dict:
+    product_ids = {item.product_id for order in orders for item in order.items}
+    stmt = (
+        select(Product).where(Product.id.in_(product_ids)).order_by(Product.id)
+    )
+    if lock:
+        stmt = stmt.with_for_update()
+    return {product.id: product for product in session.scalars(stmt)}
+
+
+def cart_quantities(order: OrderCreate, products: dict) -> Counter:
+    quantities = Counter()
+    for item in order.items:
+        if item.product_id not in products:
+            raise HTTPException(
+                status_code=HTTPStatus.NOT_FOUND,
+                detail=f'Item {item.product_id} not found',
+            )
+        quantities[item.product_id] += item.quantity
+    return quantities
+
+
+def reserve_stock(session: Session, quantities: Counter, products: dict):
+    try:
+        inventory.reserve(
+            session,
+            quantities,
+            {
+                product_id: products[product_id].stock_shards
+                for product_id in quantities
+            },
+        )
+    except inventory.InsufficientStock as e:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=f'Not enough {products[e.product_id].name} in stock',
+        )
+
+
+def order_row(order: OrderCreate, products: dict) -> dict:
+    return {
+        'client_id': order.client_id,
+        'status': OrderStatus.PENDING,
+        'total': sum(
+            products[item.product_id].price * item.quantity
+            for item in order.items
+        ),
+    }
+
+
+def insert_items(session: Session, orders: dict, products: dict) -> None:
+    session.execute(
+        insert(OrderItem),
+        [
+            {
+                'order_id': order_id,
+                'product_id': item.product_id,
+                'quantity': item.quantity,
+                'unit_price': products[item.product_id].price,
+                'category': products[item.product_id].category,
+            }
+            for order_id, order in orders.items()
+            for item in order.items
+        ],
+    )
+
+
+def place_order(session: Session, order: OrderCreate) -> Order:
+    products = load_products(session, [order])
+    quantities = cart_quantities(order, products)
+
+    new_order = Order(**order_row(order, products), items=[])
+    session.add(new_order)
+    session.flush()
+    insert_items(session, {new_order.id: order}, products)
+    sales_rollup.record_orders(session, [new_order.id])
+
+    # stock is taken last so the product rows stay locked only until
+    # the commit that follows
+    reserve_stock(session, quantities, products)
+    return new_order
+
+
+def transition_orders(
+    session: Session, order_ids: list[int], status: OrderStatus
+) -> set[int]:
+    # the allowed source states are part of the WHERE clause, so the
+    # check and the change are one statement for the whole batch
+    sources = [
+        source
+        for source, targets in ORDER_TRANSITIONS.items()
+        if status in targets
+    ]
+    updated = set(
+        session.scalars(
+            update(Order)
+            .where(Order.id.in_(order_ids), Order.status.in_(sources))
+            .values(status=status)
+            .returning(Order.id),
+            execution_options={'synchronize_session': False},
+        )
+    )
+
+    if status == OrderStatus.CANCELLED and updated:
+        sales_rollup.record_orders(session, updated, sign=-1)
+        restock = session.execute(
+            select(
+                OrderItem.product_id,
+                func.sum(OrderItem.quantity),
+                Product.stock_shards,
+            )
+            .join(Product, Product.id == OrderItem.product_id)
+            .where(OrderItem.order_id.in_(updated))
+            .group_by(OrderItem.product_id, Product.stock_shards)
+        ).all()
+        inventory.release(
+            session,
+            {product_id: quantity for product_id, quantity, _ in restock},
+            {product_id: shards for product_id, _, shards in restock},
+        )
+    return updated
+
+
+def transition_error(current: OrderStatus, status: OrderStatus) -> str:
+    return f'Cannot change order status from {current.value} to {status.value}'
 
 
 @router.post('/', status_code=HTTPStatus.CREATED, response_model=OrderOutput)
+@run_with_session
 def create_order(
     current_user: T_CurrentUser,
     session: T_Session,
     order: OrderCreate,
+    idempotency_key: T_IdempotencyKey = None,
 ):
-    try:
-        with session.begin_nested():
-            new_order = Order(
-                client_id=order.client_id,
-                status=OrderStatus.PENDING,
-                total=0,
-                items=[],
-            )
-            session.add(new_order)
-            session.flush()
-
-            total = 0
-            for item in order.items:
-                product = session.get(Product, item.product_id)
-                if not product:
-                    raise HTTPException(
-                        status_code=HTTPStatus.NOT_FOUND,
-                        detail=f'Item {item.product_id} not found',
-                    )
-                if product.quantity < item.quantity:
-                    raise HTTPException(
-                        status_code=HTTPStatus.BAD_REQUEST,
-                        detail=f'Not enough {product.name} in stock',
-                    )
-
-                product.quantity -= item.quantity
-                price_cents = product.price
-
-                order_item = OrderItem(
-                    order_id=new_order.id,
-                    product_id=item.product_id,
-                    quantity=item.quantity,
-                    unit_price=price_cents,
-                )
-                session.add(order_item)
-                total += price_cents * item.quantity
+    replayed = idempotency.replay(
+        session, current_user.id, idempotency_key, order
+    )
+    if replayed:
+        return replayed
 
-            new_order.total = total
-            session.commit()
+    try:
+        new_order = place_order(session, order)
+        session.refresh(new_order)
+        output = order_output(new_order)
+        idempotency.remember(
+            session,
+            current_user.id,
+            idempotency_key,
+            order,
+            HTTPStatus.CREATED,
+            output,
+        )
+        replayed = idempotency.commit_or_replay(
+            session, current_user.id, idempotency_key, order
+        )
 
     except HTTPException:
         session.rollback()
@@ -106,31 +337,137 @@ def create_order(
             detail=f'Error creating order {e}',
         )
 
-    new_order.total = new_order.total / 100
-    return new_order
+    return replayed or output
+
+
+@router.post(
+    '/bulk', status_code=HTTPStatus.OK, response_model=BulkOrderOutput
+)
+@run_with_session
+def create_orders_bulk(
+    current_user: T_CurrentUser,
+    session: T_Session,
+    bulk: BulkOrderCreate,
+    idempotency_key: T_IdempotencyKey = None,
+):
+    replayed = idempotency.replay(
+        session, current_user.id, idempotency_key, bulk
+    )
+    if replayed:
+        return replayed
+
+    # the products of the whole batch are locked up front in id order,
+    # reserving order by order could lock them in a different order than
+    # a concurrent batch and deadlock
+    products = load_products(session, bulk.orders, lock=True)
+    client_ids = set(
+        session.scalars(
+            select(Client.id).where(
+                Client.id.in_({order.client_id for order in bulk.orders})
+            )
+        )
+    )
+
+    # each order reserves its stock in a savepoint, a rejected order
+    # undoes only its own lines and the accepted ones are inserted
+    # together at the end
+    accepted, rejected = {}, {}
+    for index, order in enumerate(bulk.orders):
+        try:
+            if order.client_id not in client_ids:
+                raise HTTPException(
+                    status_code=HTTPStatus.NOT_FOUND,
+                    detail=f'Client {order.client_id} not found',
+                )
+            quantities = cart_quantities(order, products)
+            with session.begin_nested():
+                reserve_stock(session, quantities, products)
+            accepted[index] = order
+        except HTTPException as e:
+            rejected[index] = e.detail
+
+    order_ids = {}
+    if accepted:
+        order_ids = dict(
+            zip(
+                accepted,
+                session.scalars(
+                    insert(Order).returning(
+                        Order.id, sort_by_parameter_order=True
+                    ),
+                    [
+                        order_row(order, products)
+                        for order in accepted.values()
+                    ],
+                ),
+            )
+        )
+        insert_items(
+            session,
+            {order_ids[index]: order for index, order in accepted.items()},
+            products,
+        )
+        sales_rollup.record_orders(session, order_ids.values())
+
+    created = {
+        order.id: order
+        for order in session.scalars(
+            select(Order)
+            .options(selectinload(Order.items))
+            .where(Order.id.in_(order_ids.values()))
+        )
+    }
+
+    output = BulkOrderOutput(
+        results=[
+            {'index': index, 'created': False, 'detail': rejected[index]}
+            if index in rejected
+            else {
+                'index': index,
+                'created': True,
+                'order': order_output(created[order_ids[index]]),
+            }
+            for index in range(len(bulk.orders))
+        ]
+    )
+    idempotency.remember(
+        session, current_user.id, idempotency_key, bulk, HTTPStatus.OK, output
+    )
+    replayed = idempotency.commit_or_replay(
+        session, current_user.id, idempotency_key, bulk
+    )
+    return replayed or output
 
 
 @router.get(
     '/{order_id}', status_code=HTTPStatus.OK, response_model=OrderOutput
 )
+@run_with_session
 def get_one_order(
-    current_user: T_CurrentUser, session: T_Session, order_id: int
+    current_user: T_CurrentUser, session: T_ReadSession, order_id: int
 ):
-    order = session.scalar(select(Order).where(Order.id == order_id))
+    order = (
+        session.execute(
+            select(Order)
+            .options(joinedload(Order.items))
+            .where(Order.id == order_id)
+        )
+        .unique()
+        .scalar_one_or_none()
+    )
     if not order:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND,
             detail='Order not found',
         )
 
-    order.total = order.total / 100
-
-    return order_id
+    return order_output(order)
 
 
 @router.put(
     '/{order_id}', status_code=HTTPStatus.OK, response_model=OrderOutput
 )
+@run_with_session
 def update_order(
     current_user: T_CurrentUser,
     session: T_Session,
@@ -143,17 +480,62 @@ def update_order(
             status_code=HTTPStatus.NOT_FOUND, detail='Order not found'
         )
 
-    if order.status:
-        db_order.status = order.status
+    if order.status and order.status != db_order.status:
+        if not transition_orders(session, [order_id], order.status):
+            raise HTTPException(
+                status_code=HTTPStatus.BAD_REQUEST,
+                detail=transition_error(db_order.status, order.status),
+            )
+        session.commit()
+        session.refresh(db_order)
+
+    return order_output(db_order)
 
+
+@router.patch(
+    '/status', status_code=HTTPStatus.OK, response_model=OrderStatusBulkOutput
+)
+@run_with_session
+def update_orders_status(
+    current_user: T_CurrentUser,
+    session: T_Session,
+    bulk: OrderStatusBulkUpdate,
+):
+    order_ids = list(dict.fromkeys(bulk.order_ids))
+    updated = transition_orders(session, order_ids, bulk.status)
     session.commit()
-    session.refresh(db_order)
-    db_order.total = db_order.total / 100
 
-    return db_order
+    current = dict(
+        session.execute(
+            select(Order.id, Order.status).where(
+                Order.id.in_(set(order_ids) - updated)
+            )
+        ).all()
+    )
+
+    results = []
+    for order_id in order_ids:
+        if order_id in updated:
+            results.append({'order_id': order_id, 'updated': True})
+            continue
+
+        if order_id not in current:
+            detail = 'Order not found'
+        elif current[order_id] == bulk.status:
+            detail = f'Order already {bulk.status.value}'
+        else:
+            detail = transition_error(current[order_id], bulk.status)
+        results.append({
+            'order_id': order_id,
+            'updated': False,
+            'detail': detail,
+        })
+
+    return {'results': results}
 
 
 @router.delete('/{order_id}', status_code=HTTPStatus.NO_CONTENT)
+@run_with_session
 def delete_order(
     current_user: T_CurrentUser,
     session: T_Session,
@@ -172,6 +554,8 @@ def delete_order(
             detail='Order not found',
         )
 
+    if db_order.status != OrderStatus.CANCELLED:
+        sales_rollup.record_orders(session, [order_id], sign=-1)
     session.delete(db_order)
     session.commit()
     return
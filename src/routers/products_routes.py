@@ -1,39 +1,62 @@
 from datetime import datetime
 from http import HTTPStatus
+from io import TextIOWrapper
 from typing import Annotated, Optional
 
 from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from src.models.auth_model import User
-from src.models.products_model import Product
+from src.models.products_model import ImageStatus, Product
+from src.schemas.import_schema import ImportReport
 from src.schemas.products_schema import (
     BaseProduct,
     ListProducts,
     ProductOutput,
+    StockShards,
 )
-from src.services.database import get_session
+from src.services import inventory, product_import
+from src.services.database import (
+    get_read_session,
+    get_session,
+    run_sync,
+    run_with_session,
+)
+from src.services.image_queue import image_queue
+from src.services.integrity import unique_violation
+from src.services.principal_cache import Principal
 from src.services.security import get_current_user
-from src.utils.cloudinary_upload import upload_image
+from src.utils.pagination import keyset_page
 
 router = APIRouter(prefix='/products', tags=['Products'])
 
 # types
-T_CurrentUser = Annotated[User, Depends(get_current_user)]
+T_CurrentUser = Annotated[Principal, Depends(get_current_user)]
 T_Session = Annotated[Session, Depends(get_session)]
+T_ReadSession = Annotated[Session, Depends(get_read_session)]
 T_Multpart = Annotated[BaseProduct, Depends(BaseProduct.as_form)]
 
+MAX_STOCK_SHARDS = 64
+
+CREATE_CONSTRAINTS = {'products_barcode_key': 'This codebar already exists'}
+UPDATE_CONSTRAINTS = {
+    'products_barcode_key': 'CPF already registered by another user'
+}
+
 
 @router.get('/', status_code=HTTPStatus.OK, response_model=ListProducts)
+@run_with_session
 def get_all_products(
     current_user: T_CurrentUser,
-    session: T_Session,
+    session: T_ReadSession,
     limit: int = 10,
     skip: int = 0,
     category: Optional[int] = Query(None),
     price: Optional[str] = Query(None),
     availability: Optional[str] = Query(None),
+    after: Optional[str] = Query(None),
+    before: Optional[str] = Query(None),
 ):
     stmt = select(Product)
 
@@ -44,10 +67,13 @@ def get_all_products(
     if availability:
         stmt = stmt.where(Product.quantity >= 0)
 
-    stmt = stmt.offset(skip).limit(limit).order_by(Product.id)
-    products = session.scalars(stmt).all()
+    page = keyset_page(session, stmt, Product.id, limit, skip, after, before)
 
-    return {'products': products}
+    return {
+        'products': page.items,
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+    }
 
 
 @router.post('/', status_code=HTTPStatus.CREATED, response_model=ProductOutput)
@@ -73,17 +99,6 @@ async def create_product(
             status_code=HTTPStatus.BAD_REQUEST, detail='Insert a valid date'
         )
 
-    db_product = session.scalar(
-        select(Product).where(Product.barcode == product.barcode)
-    )
-    if db_product:
-        raise HTTPException(
-            status_code=HTTPStatus.BAD_REQUEST,
-            detail='This codebar already exists',
-        )
-
-    image_url = await upload_image(image=image)
-
     db_product = Product(
         name=product.name,
         description=product.description,
@@ -92,21 +107,53 @@ async def create_product(
         barcode=product.barcode,
         quantity=product.quantity,
         expiration=product.expiration,
-        image=image_url,
+        image=None,
+        image_status=ImageStatus.PENDING,
     )
+    data = await image.read()
     session.add(db_product)
-    session.commit()
-    session.refresh(db_product)
+    # the image is spooled before the commit, so a committed pending
+    # product always has its file; it is uploaded in the background and
+    # fills in image and image_status when done
+    spooled = None
+    try:
+        await run_sync(session, Session.flush)
+        spooled = db_product.id
+        await image_queue.spool(spooled, data)
+        await run_sync(session, Session.commit)
+    except Exception as error:
+        await run_sync(session, Session.rollback)
+        if spooled:
+            await image_queue.discard(spooled)
+        if isinstance(error, IntegrityError):
+            unique_violation(error, CREATE_CONSTRAINTS)
+        raise
+    image_queue.enqueue(db_product.id)
+    await run_sync(session, Session.refresh, db_product)
 
     db_product.price = product.price
 
     return db_product
 
 
+@router.post('/import', status_code=HTTPStatus.OK, response_model=ImportReport)
+@run_with_session
+def import_products(
+    current_user: T_CurrentUser,
+    session: T_Session,
+    file: UploadFile = File(...),
+):
+    # the upload is read line by line and loaded in batches, the file is
+    # never held in memory as a whole
+    lines = TextIOWrapper(file.file, encoding='utf-8-sig', newline='')
+    return product_import.import_products(session, lines)
+
+
 @router.get('/{client_id}', response_model=ProductOutput)
+@run_with_session
 def get_one_product(
     current_user: T_CurrentUser,
-    session: T_Session,
+    session: T_ReadSession,
     product_id: int,
 ):
     product = session.scalar(
@@ -124,6 +171,7 @@ def get_one_product(
 
 
 @router.put('/{client_id}', response_model=ProductOutput)
+@run_with_session
 def update_product(
     current_user: T_CurrentUser,
     session: T_Session,
@@ -147,30 +195,73 @@ def update_product(
         )
 
     db_product = session.scalar(
-        select(Product).where(Product.id == product_id)
+        select(Product).where(Product.id == product_id).with_for_update()
     )
     if not db_product:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND, detail='User not found'
         )
 
-    barcode_registered = session.scalar(
-        select(Product).where(Product.barcode == product.barcode),
-    )
-    if barcode_registered and barcode_registered.id != product_id:
-        raise HTTPException(
-            status_code=HTTPStatus.BAD_REQUEST,
-            detail='CPF already registered by another user',
-        )
-
     db_product.name = product.name
     db_product.description = product.description
     db_product.category = product.category
     db_product.price = product.price * 100
     db_product.barcode = product.barcode
-    db_product.quantity = product.quantity
     db_product.expiration = product.expiration
+    # the shards are locked before they are replaced so no order takes
+    # from them meanwhile; re-sharding flushes the barcode change too
+    try:
+        if db_product.stock_shards:
+            inventory.locked_stock(session, db_product)
+            inventory.shard_stock(
+                session, db_product, db_product.stock_shards, product.quantity
+            )
+        else:
+            db_product.quantity = product.quantity
+        session.commit()
+    except IntegrityError as error:
+        session.rollback()
+        unique_violation(error, UPDATE_CONSTRAINTS)
+    session.refresh(db_product)
 
+    db_product.price = db_product.price / 100
+    return db_product
+
+
+@router.put('/{product_id}/stock-shards', response_model=ProductOutput)
+@run_with_session
+def update_stock_shards(
+    current_user: T_CurrentUser,
+    session: T_Session,
+    product_id: int,
+    stock_shards: StockShards,
+):
+    if current_user.profile != 'admin':
+        raise HTTPException(
+            status_code=HTTPStatus.FORBIDDEN,
+            detail='Not enough permission',
+        )
+
+    if not 0 <= stock_shards.shards <= MAX_STOCK_SHARDS:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=f'Shards must be between 0 and {MAX_STOCK_SHARDS}',
+        )
+
+    db_product = session.scalar(
+        select(Product).where(Product.id == product_id).with_for_update()
+    )
+    if not db_product:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail='Product not found'
+        )
+
+    inventory.shard_stock(
+        session,
+        db_product,
+        stock_shards.shards,
+        inventory.locked_stock(session, db_product),
+    )
     session.commit()
     session.refresh(db_product)
 
@@ -179,6 +270,7 @@ def update_product(
 
 
 @router.delete('/{client_id}', status_code=HTTPStatus.NO_CONTENT)
+@run_with_session
 def delete_product(
     current_user: T_CurrentUser,
     session: T_Session,
@@ -0,0 +1,67 @@
+from datetime import date
+from enum import Enum
+from http import HTTPStatus
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.models.report_model import CategoryDailySales, ProductDailySales
+from src.schemas.report_schema import SalesReport
+from src.services.database import get_read_session, run_with_session
+from src.services.principal_cache import Principal
+from src.services.security import get_current_user
+
+router = APIRouter(prefix='/reports', tags=['Reports'])
+
+# types
+T_CurrentUser = Annotated[Principal, Depends(get_current_user)]
+T_ReadSession = Annotated[Session, Depends(get_read_session)]
+
+
+class SalesGrouping(str, Enum):
+    PRODUCT = 'product'
+    CATEGORY = 'category'
+
+
+@router.get('/sales', status_code=HTTPStatus.OK, response_model=SalesReport)
+@run_with_session
+def get_sales(
+    current_user: T_CurrentUser,
+    session: T_ReadSession,
+    group_by: SalesGrouping = SalesGrouping.PRODUCT,
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    product_id: Optional[int] = Query(None),
+    category: Optional[str] = Query(None),
+):
+    # reads only the daily rollups, never orders or order_items
+    if group_by == SalesGrouping.PRODUCT:
+        table, key, value = ProductDailySales, 'product_id', product_id
+    else:
+        table, key, value = CategoryDailySales, 'category', category
+
+    stmt = select(table)
+    if value:
+        stmt = stmt.where(getattr(table, key) == value)
+    if date_from:
+        stmt = stmt.where(table.day >= date_from)
+    if date_to:
+        stmt = stmt.where(table.day <= date_to)
+
+    rows = session.scalars(stmt.order_by(table.day, getattr(table, key))).all()
+
+    return {
+        'sales': [
+            {
+                'day': row.day,
+                'product_id': getattr(row, 'product_id', None),
+                'category': getattr(row, 'category', None),
+                'revenue': row.revenue / 100,
+                'units': row.units,
+                'orders': row.orders,
+            }
+            for row in rows
+        ]
+    }
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel, EmailStr
 
@@ -20,3 +20,5 @@ class PublicClient(BaseModel):
 
 class ListClients(BaseModel):
     clients: List[PublicClient]
+    next_cursor: Optional[str] = None
+    previous_cursor: Optional[str] = None
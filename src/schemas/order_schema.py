@@ -1,6 +1,6 @@
 from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from src.models.order_model import OrderStatus
 
@@ -37,7 +37,39 @@ class OrderOutput(BaseModel):
 
 class ListOrders(BaseModel):
     orders: List[OrderOutput]
+    next_cursor: Optional[str] = None
+    previous_cursor: Optional[str] = None
+
+
+class BulkOrderCreate(BaseModel):
+    orders: List[OrderCreate] = Field(min_length=1, max_length=1000)
+
+
+class BulkOrderResult(BaseModel):
+    index: int
+    created: bool
+    order: Optional[OrderOutput] = None
+    detail: Optional[str] = None
+
+
+class BulkOrderOutput(BaseModel):
+    results: List[BulkOrderResult]
 
 
 class OrderUpdate(BaseModel):
     status: Optional[OrderStatus] = None
+
+
+class OrderStatusBulkUpdate(BaseModel):
+    order_ids: List[int] = Field(min_length=1, max_length=1000)
+    status: OrderStatus
+
+
+class OrderStatusResult(BaseModel):
+    order_id: int
+    updated: bool
+    detail: Optional[str] = None
+
+
+class OrderStatusBulkOutput(BaseModel):
+    results: List[OrderStatusResult]
@@ -1,8 +1,10 @@
 from datetime import date, datetime
-from typing import List
+from typing import List, Optional
 
 from fastapi import Form
-from pydantic import BaseModel, field_validator
+from pydantic import AliasChoices, BaseModel, Field, field_validator
+
+from src.models.products_model import ImageStatus
 
 
 class BaseProduct(BaseModel):
@@ -53,10 +55,24 @@ class ProductOutput(BaseModel):
     category: str
     price: float
     barcode: str
-    quantity: int
+    # sharded products report the sum of their stock shards
+    quantity: int = Field(validation_alias=AliasChoices('stock', 'quantity'))
     expiration: date
-    image: str
+    image: Optional[str] = None
+    thumbnail: Optional[str] = None
+    image_status: Optional[ImageStatus] = None
+
+
+class StockShards(BaseModel):
+    shards: int
+
+
+class ProductSummary(ProductOutput):
+    # the thumbnail, or the image for products without one
+    preview: Optional[str] = None
 
 
 class ListProducts(BaseModel):
-    products: List[ProductOutput]
+    products: List[ProductSummary]
+    next_cursor: Optional[str] = None
+    previous_cursor: Optional[str] = None
@@ -0,0 +1,17 @@
+from datetime import date
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class SalesRow(BaseModel):
+    day: date
+    product_id: Optional[int] = None
+    category: Optional[str] = None
+    revenue: float
+    units: int
+    orders: int
+
+
+class SalesReport(BaseModel):
+    sales: List[SalesRow]
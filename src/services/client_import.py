@@ -0,0 +1,86 @@
+import csv
+from itertools import batched
+from typing import Iterable
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from src.models.client_model import Client
+from src.schemas.client_schema import CreateClient
+from src.utils.cpf_validator import check_cpfs
+from src.utils.validation_errors import validation_errors
+
+IMPORT_BATCH_SIZE = 1000
+
+
+def parse_rows(batch) -> tuple[list, list]:
+    parsed, rejected = [], []
+    for line, row in batch:
+        try:
+            parsed.append((line, CreateClient.model_validate(row)))
+        except ValidationError as e:
+            rejected.append({'line': line, 'errors': validation_errors(e)})
+    return parsed, rejected
+
+
+def import_clients(
+    session: Session,
+    lines: Iterable[str],
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> dict:
+    reader = csv.DictReader(lines)
+    seen_emails, seen_cpfs = set(), set()
+    imported = 0
+    rejected = []
+
+    # the header is line 1
+    for batch in batched(enumerate(reader, start=2), batch_size):
+        parsed, invalid = parse_rows(batch)
+        rejected.extend(invalid)
+        cpfs = check_cpfs(client.cpf for _, client in parsed)
+
+        # two set based lookups per batch instead of one per client
+        emails = [client.email for _, client in parsed]
+        registered_emails = set(
+            session.scalars(
+                select(Client.email).where(Client.email.in_(emails))
+            )
+        )
+        registered_cpfs = set(
+            session.scalars(
+                select(Client.cpf).where(
+                    Client.cpf.in_([cpf for cpf, _ in cpfs])
+                )
+            )
+        )
+
+        rows = []
+        for (line, client), (cpf, valid) in zip(parsed, cpfs):
+            if not valid:
+                errors = ['Invalid CPF']
+            elif (
+                client.email in registered_emails
+                or client.email in seen_emails
+            ):
+                errors = ['Email already exists']
+            elif cpf in registered_cpfs or cpf in seen_cpfs:
+                errors = ['CPF already exists']
+            else:
+                seen_emails.add(client.email)
+                seen_cpfs.add(cpf)
+                rows.append({
+                    'name': client.name,
+                    'email': client.email,
+                    'cpf': cpf,
+                })
+                continue
+            rejected.append({'line': line, 'errors': errors})
+
+        if rows:
+            session.execute(insert(Client), rows)
+            session.commit()
+            imported += len(rows)
+
+    rejected.sort(key=lambda row: row['line'])
+    return {'imported': imported, 'rejected': rejected}
@@ -1,11 +1,159 @@
-from sqlalchemy import create_engine
+from functools import wraps
+
+from fastapi import Request
+from sqlalchemy import create_engine, event, make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
+from .pool_metrics import (
+    InstrumentedAsyncPool,
+    InstrumentedQueuePool,
+    pool_metrics,
+)
+from .replicas import ReplicaRouter
 from .settings import Settings
 
-engine = create_engine(Settings().DATABASE_URL)
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+settings = Settings()
+
+
+def pool_options(name: str) -> dict:
+    return {
+        'pool_logging_name': name,
+        'pool_size': settings.DATABASE_POOL_SIZE,
+        'max_overflow': settings.DATABASE_MAX_OVERFLOW,
+        'pool_timeout': settings.DATABASE_POOL_TIMEOUT,
+        'pool_recycle': settings.DATABASE_POOL_RECYCLE,
+        'pool_pre_ping': settings.DATABASE_POOL_PRE_PING,
+    }
+
+
+def async_database_url(database_url: str):
+    url = make_url(database_url)
+    return url.set(
+        drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername)
+    )
+
+
+def build_engine(database_url: str, name: str):
+    if settings.DATABASE_ASYNC:
+        async_engine = create_async_engine(
+            async_database_url(database_url),
+            poolclass=InstrumentedAsyncPool,
+            **pool_options(name),
+        )
+        pool_metrics.track(name, async_engine.sync_engine)
+        return async_engine
+
+    engine = create_engine(
+        database_url,
+        poolclass=InstrumentedQueuePool,
+        **pool_options(name),
+    )
+    pool_metrics.track(name, engine)
+    return engine
+
+
+engine = create_engine(
+    settings.DATABASE_URL,
+    poolclass=InstrumentedQueuePool,
+    **pool_options('primary'),
+)
+pool_metrics.track('primary', engine)
+
+async_engine = (
+    build_engine(settings.DATABASE_URL, 'primary_async')
+    if settings.DATABASE_ASYNC
+    else None
+)
+
+replica_router = ReplicaRouter(
+    engines=[
+        build_engine(url.strip(), f'replica_{index}')
+        for index, url in enumerate(
+            filter(str.strip, settings.DATABASE_REPLICA_URLS.split(','))
+        )
+    ],
+    eviction_seconds=settings.DATABASE_REPLICA_EVICTION_SECONDS,
+    read_after_write_seconds=settings.DATABASE_READ_AFTER_WRITE_SECONDS,
+)
+
+
+def writer_key(request: Request) -> str | None:
+    return request.headers.get('authorization')
+
 
+@event.listens_for(Session, 'after_commit')
+def remember_writer(session: Session):
+    writer = session.info.get('writer')
+    if writer:
+        replica_router.note_write(writer)
 
-def get_session():  # pragma: no cover
-    with Session(engine) as session:
+
+def get_sync_session(request: Request):  # pragma: no cover
+    with Session(engine, info={'writer': writer_key(request)}) as session:
+        yield session
+
+
+async def get_async_session(request: Request):  # pragma: no cover
+    async with AsyncSession(
+        async_engine,
+        expire_on_commit=False,
+        info={'writer': writer_key(request)},
+    ) as session:
         yield session
+
+
+def get_sync_read_session(request: Request):  # pragma: no cover
+    replica = replica_router.route(writer_key(request)) or engine
+    with Session(replica) as session:
+        try:
+            yield session
+        except OperationalError:
+            if replica is not engine:
+                replica_router.evict(replica)
+            raise
+
+
+async def get_async_read_session(request: Request):  # pragma: no cover
+    replica = replica_router.route(writer_key(request)) or async_engine
+    async with AsyncSession(replica, expire_on_commit=False) as session:
+        try:
+            yield session
+        except OperationalError:
+            if replica is not async_engine:
+                replica_router.evict(replica)
+            raise
+
+
+if settings.DATABASE_ASYNC:
+    get_session = get_async_session
+    get_read_session = get_async_read_session
+else:
+    get_session = get_sync_session
+    get_read_session = get_sync_read_session
+
+
+async def run_sync(session: Session | AsyncSession, fn, *args, **kwargs):
+    if isinstance(session, AsyncSession):
+        return await session.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, session, *args, **kwargs)
+
+
+def run_with_session(fn):
+    # sync handlers run in the threadpool with a Session, or on the event
+    # loop through AsyncSession.run_sync when the async engine is enabled
+    @wraps(fn)
+    async def wrapper(*args, session, **kwargs):
+        return await run_sync(
+            session,
+            lambda sync_session: fn(*args, session=sync_session, **kwargs),
+        )
+
+    return wrapper
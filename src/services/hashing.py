@@ -0,0 +1,75 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from multiprocessing import get_context
+
+from fastapi import HTTPException
+
+from src.services.security import get_password_hash, verify_password
+from src.services.settings import Settings
+
+
+class HashingPool:
+    def __init__(self, workers: int, queue_depth: int, retry_after: int):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.retry_after = retry_after
+        self.pending = 0
+        self.rejected = 0
+        self._executor: ProcessPoolExecutor | None = None
+
+    def start(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # forked children would inherit the server's threads and locks
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=get_context('forkserver'),
+            )
+        return self._executor
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    async def run(self, fn, *args):
+        if self.pending >= self.workers + self.queue_depth:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                detail='Too many authentication requests, try again later',
+                headers={'Retry-After': str(self.retry_after)},
+            )
+
+        self.pending += 1
+        try:
+            future = self.start().submit(fn, *args)
+            return await asyncio.wrap_future(future)
+        finally:
+            self.pending -= 1
+
+    def stats(self) -> dict:
+        return {
+            'workers': self.workers,
+            'queue_depth': self.queue_depth,
+            'pending': self.pending,
+            'rejected': self.rejected,
+        }
+
+
+settings = Settings()
+hashing_pool = HashingPool(
+    workers=settings.HASHING_POOL_SIZE,
+    queue_depth=settings.HASHING_QUEUE_DEPTH,
+    retry_after=settings.HASHING_RETRY_AFTER_SECONDS,
+)
+
+
+async def hash_password(password: str) -> str:
+    return await hashing_pool.run(get_password_hash, password)
+
+
+async def check_password(plain_password: str, hashed_password: str) -> bool:
+    return await hashing_pool.run(
+        verify_password, plain_password, hashed_password
+    )
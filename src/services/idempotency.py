@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+from hashlib import sha256
+from http import HTTPStatus
+from typing import Optional
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from src.models.idempotency_model import IdempotencyKey
+
+from .settings import Settings
+
+settings = Settings()
+
+
+def fingerprint(payload: BaseModel) -> str:
+    return sha256(payload.model_dump_json().encode()).hexdigest()
+
+
+def replay(
+    session: Session, user_id: int, key: Optional[str], payload: BaseModel
+) -> Optional[JSONResponse]:
+    if not key:
+        return None
+
+    stored = session.get(IdempotencyKey, (user_id, key))
+    if stored is None:
+        return None
+
+    if stored.expires_at <= datetime.now():
+        session.delete(stored)
+        session.flush()
+        return None
+
+    if stored.fingerprint != fingerprint(payload):
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail='Idempotency-Key already used with a different request',
+        )
+
+    return JSONResponse(
+        stored.response,
+        status_code=stored.status_code,
+        headers={'Idempotent-Replayed': 'true'},
+    )
+
+
+def remember(
+    session: Session,
+    user_id: int,
+    key: Optional[str],
+    payload: BaseModel,
+    status_code: int,
+    response: BaseModel,
+) -> None:
+    # stored in the same transaction as the write it describes, so a
+    # snapshot exists exactly when the write was committed
+    if not key:
+        return
+
+    session.add(
+        IdempotencyKey(
+            user_id=user_id,
+            key=key,
+            fingerprint=fingerprint(payload),
+            status_code=status_code,
+            response=response.model_dump(mode='json'),
+            expires_at=datetime.now()
+            + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+        )
+    )
+
+
+def commit_or_replay(
+    session: Session, user_id: int, key: Optional[str], payload: BaseModel
+) -> Optional[JSONResponse]:
+    try:
+        session.commit()
+    except IntegrityError:
+        # a concurrent request with the same key committed first, its
+        # write wins and this one is answered with its snapshot
+        session.rollback()
+        replayed = replay(session, user_id, key, payload)
+        if replayed is None:
+            raise
+        return replayed
+    return None
+
+
+def purge_expired(session: Session) -> int:
+    result = session.execute(
+        delete(IdempotencyKey).where(
+            IdempotencyKey.expires_at <= datetime.now()
+        )
+    )
+    session.commit()
+    return result.rowcount
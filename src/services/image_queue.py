@@ -0,0 +1,260 @@
+import asyncio
+import os
+from hashlib import sha256
+from http import HTTPStatus
+from pathlib import Path
+
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from src.models.image_model import ImageIndex
+from src.models.products_model import ImageStatus, Product
+from src.services.database import engine
+from src.services.settings import Settings
+from src.utils.cloudinary_upload import upload_pool
+from src.utils.thumbnails import prepare_images
+
+RETRY_BACKOFF_SECONDS = 1
+
+
+class ImageQueue:
+    def __init__(
+        self,
+        spool_dir: str,
+        workers: int,
+        engine,
+        max_size: int,
+        thumbnail_size: int,
+        retries: int,
+    ):
+        self.spool_dir = Path(spool_dir)
+        self.workers = workers
+        self.engine = engine
+        self.max_size = max_size
+        self.thumbnail_size = thumbnail_size
+        self.retries = retries
+        self.processed = 0
+        self.failed = 0
+        self.retried = 0
+        self.requeued = 0
+        self.reused = 0
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._uploads: dict[str, asyncio.Task] = {}
+
+    def start(self) -> None:
+        # the spool directory is the source of truth, whatever is left in
+        # it from a previous run is uploaded again
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self._queue = asyncio.Queue()
+        # temp files of unfinished writes and any stray file are skipped
+        for product_id in sorted(
+            int(path.name)
+            for path in self.spool_dir.iterdir()
+            if path.name.isascii() and path.name.isdigit()
+        ):
+            self._queue.put_nowait(product_id)
+        self._tasks = [
+            asyncio.create_task(self.work()) for _ in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    async def join(self) -> None:
+        await self._queue.join()
+
+    def spool_path(self, product_id: int) -> Path:
+        return self.spool_dir / str(product_id)
+
+    def write(self, product_id: int, data: bytes) -> None:
+        # written aside and renamed, a crash never leaves a truncated
+        # image under the product id
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        temp = self.spool_dir / f'.{product_id}.tmp'
+        temp.write_bytes(data)
+        os.replace(temp, self.spool_path(product_id))
+
+    async def spool(self, product_id: int, data: bytes) -> None:
+        await asyncio.to_thread(self.write, product_id, data)
+
+    async def discard(self, product_id: int) -> None:
+        await asyncio.to_thread(
+            self.spool_path(product_id).unlink, missing_ok=True
+        )
+
+    def enqueue(self, product_id: int) -> None:
+        # without running workers the file waits in the spool for start()
+        if self._queue is not None:
+            self._queue.put_nowait(product_id)
+
+    def indexed(self, content_hash: str) -> tuple[str, str] | None:
+        with Session(self.engine) as session:
+            return session.execute(
+                select(ImageIndex.url, ImageIndex.thumbnail).where(
+                    ImageIndex.content_hash == content_hash
+                )
+            ).one_or_none()
+
+    def index(self, content_hash: str, url: str, thumbnail: str) -> None:
+        with Session(self.engine) as session:
+            dialect = session.get_bind().dialect.name
+            insert = (
+                postgresql.insert if dialect == 'postgresql' else sqlite.insert
+            )
+            session.execute(
+                insert(ImageIndex)
+                .values(
+                    content_hash=content_hash, url=url, thumbnail=thumbnail
+                )
+                .on_conflict_do_nothing(index_elements=['content_hash'])
+            )
+            session.commit()
+
+    def save(
+        self,
+        product_id: int,
+        image: str | None,
+        thumbnail: str | None,
+        status: ImageStatus,
+    ) -> None:
+        # only a pending product is updated, when processes sharing the
+        # spool handle the same image the first result stays
+        with Session(self.engine) as session:
+            session.execute(
+                update(Product)
+                .where(
+                    Product.id == product_id,
+                    Product.image_status == ImageStatus.PENDING,
+                )
+                .values(image=image, thumbnail=thumbnail, image_status=status)
+            )
+            session.commit()
+
+    async def upload(self, content_hash: str, data: bytes) -> tuple[str, str]:
+        urls = await asyncio.to_thread(self.indexed, content_hash)
+        if urls:
+            self.reused += 1
+            return tuple(urls)
+
+        # resized here so only the bytes that are served get sent
+        full, thumbnail = await asyncio.to_thread(
+            prepare_images, data, self.max_size, self.thumbnail_size
+        )
+        urls = await asyncio.gather(
+            upload_pool.run(full), upload_pool.run(thumbnail)
+        )
+        await asyncio.to_thread(self.index, content_hash, *urls)
+        return tuple(urls)
+
+    async def store(self, data: bytes) -> tuple[str, str]:
+        # workers holding the same image wait for a single upload
+        content_hash = sha256(data).hexdigest()
+        task = self._uploads.get(content_hash)
+        if task is None:
+            task = asyncio.create_task(self.upload(content_hash, data))
+            self._uploads[content_hash] = task
+            task.add_done_callback(
+                lambda _: self._uploads.pop(content_hash, None)
+            )
+        return await task
+
+    async def process(self, product_id: int) -> None:
+        path = self.spool_path(product_id)
+        try:
+            data = await asyncio.to_thread(path.read_bytes)
+        except FileNotFoundError:
+            # already handled by another process sharing the spool
+            return
+        try:
+            image, thumbnail = await self.store(data)
+            status = ImageStatus.READY
+        except (HTTPException, ValueError) as e:
+            # a full upload pool is temporary, only a rejected or invalid
+            # image fails the product
+            if (
+                isinstance(e, HTTPException)
+                and e.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+            ):
+                raise
+            image, thumbnail, status = None, None, ImageStatus.FAILED
+            self.failed += 1
+
+        await asyncio.to_thread(
+            self.save, product_id, image, thumbnail, status
+        )
+        path.unlink(missing_ok=True)
+        self.processed += 1
+
+    async def give_up(self, product_id: int) -> None:
+        # the product is marked failed instead of staying pending; when
+        # even that fails the file stays in the spool for the next start
+        self.failed += 1
+        self.processed += 1
+        try:
+            await asyncio.to_thread(
+                self.save, product_id, None, None, ImageStatus.FAILED
+            )
+        except Exception:
+            return
+        self.spool_path(product_id).unlink(missing_ok=True)
+
+    async def attempt(self, product_id: int) -> bool:
+        # errors other than a rejected image, like a database or spool
+        # failure, are retried with backoff
+        for retry in range(self.retries + 1):
+            if retry:
+                self.retried += 1
+                await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** (retry - 1))
+            try:
+                await self.process(product_id)
+                return True
+            except HTTPException:
+                # only raised when the upload pool is full
+                raise
+            except Exception:
+                continue
+        return False
+
+    async def work(self) -> None:
+        while True:
+            product_id = await self._queue.get()
+            try:
+                if not await self.attempt(product_id):
+                    await self.give_up(product_id)
+            except HTTPException:
+                # the image goes back to the end of the queue, the wait
+                # also keeps this worker from adding to the full pool
+                self.requeued += 1
+                await asyncio.sleep(RETRY_BACKOFF_SECONDS)
+                self._queue.put_nowait(product_id)
+            finally:
+                self._queue.task_done()
+
+    def stats(self) -> dict:
+        return {
+            'workers': self.workers,
+            'queued': self._queue.qsize() if self._queue else 0,
+            'processed': self.processed,
+            'failed': self.failed,
+            'retried': self.retried,
+            'requeued': self.requeued,
+            'reused': self.reused,
+        }
+
+
+settings = Settings()
+image_queue = ImageQueue(
+    spool_dir=settings.IMAGE_SPOOL_DIR,
+    workers=settings.IMAGE_UPLOAD_WORKERS,
+    engine=engine,
+    max_size=settings.IMAGE_MAX_SIZE,
+    thumbnail_size=settings.IMAGE_THUMBNAIL_SIZE,
+    retries=settings.IMAGE_UPLOAD_RETRIES,
+)
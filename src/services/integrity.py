@@ -0,0 +1,33 @@
+from http import HTTPStatus
+from re import compile
+from typing import NoReturn, Optional
+
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+
+SQLITE_UNIQUE = compile(r'UNIQUE constraint failed: (\w+)\.(\w+)$')
+
+
+def violated_constraint(error: IntegrityError) -> Optional[str]:
+    # psycopg2 reports the constraint name in diag, asyncpg on the error
+    # the adapter wraps, sqlite only names the column so the name is built
+    # with the same convention as table_registry
+    diag = getattr(error.orig, 'diag', None)
+    if diag is not None:
+        return diag.constraint_name
+    name = getattr(error.orig.__cause__, 'constraint_name', None)
+    if name:
+        return name
+    match = SQLITE_UNIQUE.search(str(error.orig))
+    if match:
+        return '{}_{}_key'.format(*match.groups())
+    return None
+
+
+def unique_violation(error: IntegrityError, messages: dict) -> NoReturn:
+    detail = messages.get(violated_constraint(error))
+    if detail is None:
+        raise error
+    raise HTTPException(
+        status_code=HTTPStatus.BAD_REQUEST, detail=detail
+    ) from error
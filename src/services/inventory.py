@@ -0,0 +1,159 @@
+from random import randrange
+from typing import Mapping
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from src.models.products_model import Product, ProductStockShard
+
+
+class InsufficientStock(Exception):
+    def __init__(self, product_id: int):
+        super().__init__(f'Not enough stock for product {product_id}')
+        self.product_id = product_id
+
+
+def reserve(
+    session: Session,
+    quantities: Mapping[int, int],
+    shards: Mapping[int, int] | None = None,
+) -> None:
+    # the stock check and the decrement are one statement, so no lock is
+    # taken before the write and a shortfall never oversells; ids are
+    # visited in order so concurrent carts lock rows in the same order
+    shards = shards or {}
+    for product_id in sorted(quantities):
+        if shards.get(product_id):
+            reserve_from_shards(
+                session,
+                product_id,
+                quantities[product_id],
+                shards[product_id],
+            )
+            continue
+
+        quantity = quantities[product_id]
+        remaining = session.scalar(
+            update(Product)
+            .where(Product.id == product_id, Product.quantity >= quantity)
+            .values(quantity=Product.quantity - quantity)
+            .returning(Product.quantity),
+            execution_options={'synchronize_session': False},
+        )
+        if remaining is None:
+            raise InsufficientStock(product_id)
+
+
+def release(
+    session: Session,
+    quantities: Mapping[int, int],
+    shards: Mapping[int, int] | None = None,
+) -> None:
+    shards = shards or {}
+    for product_id in sorted(quantities):
+        quantity = quantities[product_id]
+        if shards.get(product_id):
+            stmt = (
+                update(ProductStockShard)
+                .where(
+                    ProductStockShard.product_id == product_id,
+                    ProductStockShard.shard == randrange(shards[product_id]),
+                )
+                .values(quantity=ProductStockShard.quantity + quantity)
+            )
+        else:
+            stmt = (
+                update(Product)
+                .where(Product.id == product_id)
+                .values(quantity=Product.quantity + quantity)
+            )
+        session.execute(stmt, execution_options={'synchronize_session': False})
+
+
+def take_from_shard(
+    session: Session, product_id: int, shard: int, quantity: int
+) -> bool:
+    taken = session.scalar(
+        update(ProductStockShard)
+        .where(
+            ProductStockShard.product_id == product_id,
+            ProductStockShard.shard == shard,
+            ProductStockShard.quantity >= quantity,
+        )
+        .values(quantity=ProductStockShard.quantity - quantity)
+        .returning(ProductStockShard.shard),
+        execution_options={'synchronize_session': False},
+    )
+    return taken is not None
+
+
+def reserve_from_shards(
+    session: Session, product_id: int, quantity: int, shards: int
+) -> None:
+    # a random shard spreads concurrent orders over different rows, the
+    # next shards are tried when the chosen one cannot cover the order
+    first = randrange(shards)
+    for offset in range(shards):
+        shard = (first + offset) % shards
+        if take_from_shard(session, product_id, shard, quantity):
+            return
+
+    # no single shard covers the order, drain them in shard order. The
+    # shards are read as columns and written with Core, shard objects
+    # already loaded in the session would hold stale quantities
+    rows = session.execute(
+        select(ProductStockShard.shard, ProductStockShard.quantity)
+        .where(ProductStockShard.product_id == product_id)
+        .order_by(ProductStockShard.shard)
+        .with_for_update()
+    ).all()
+    if sum(row.quantity for row in rows) < quantity:
+        raise InsufficientStock(product_id)
+
+    for row in rows:
+        taken = min(row.quantity, quantity)
+        if taken:
+            take_from_shard(session, product_id, row.shard, taken)
+        quantity -= taken
+
+
+def locked_stock(session: Session, product: Product) -> int:
+    # callers lock the product row, the shards are locked here so no
+    # order takes from them while the stock is being moved
+    if not product.stock_shards:
+        return product.quantity
+    return sum(
+        session.scalars(
+            select(ProductStockShard.quantity)
+            .where(ProductStockShard.product_id == product.id)
+            .with_for_update()
+        )
+    )
+
+
+def shard_stock(
+    session: Session, product: Product, shards: int, quantity: int
+) -> None:
+    session.execute(
+        delete(ProductStockShard).where(
+            ProductStockShard.product_id == product.id
+        )
+    )
+    product.stock_shards = shards
+    if not shards:
+        product.quantity = quantity
+        return
+
+    product.quantity = 0
+    share, rest = divmod(quantity, shards)
+    session.execute(
+        insert(ProductStockShard),
+        [
+            {
+                'product_id': product.id,
+                'shard': shard,
+                'quantity': share + (shard < rest),
+            }
+            for shard in range(shards)
+        ],
+    )
@@ -0,0 +1,146 @@
+import csv
+import json
+from io import StringIO
+
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+
+from src.models.order_model import Order, OrderItem
+
+YIELD_PER = 1000
+CHUNK_ROWS = 500
+
+CSV_HEADER = (
+    'order_id',
+    'client_id',
+    'status',
+    'total',
+    'created_at',
+    'product_id',
+    'quantity',
+    'unit_price',
+)
+
+
+def export_statement(stmt: Select) -> Select:
+    # one flat row per order line, orders come in id order so the lines
+    # of an order are always next to each other
+    return (
+        stmt.with_only_columns(
+            Order.id,
+            Order.client_id,
+            Order.status,
+            Order.total,
+            Order.created_at,
+            OrderItem.product_id,
+            OrderItem.quantity,
+            OrderItem.unit_price,
+        )
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+        .order_by(Order.id, OrderItem.id)
+    )
+
+
+class CsvEncoder:
+    def __init__(self):
+        self.buffer = StringIO()
+        self.writer = csv.writer(self.buffer)
+        self.writer.writerow(CSV_HEADER)
+
+    def feed(self, row) -> None:
+        self.writer.writerow((
+            row.id,
+            row.client_id,
+            row.status.value,
+            row.total / 100,
+            row.created_at.isoformat(),
+            row.product_id,
+            row.quantity,
+            row.unit_price,
+        ))
+
+    def flush(self) -> str:
+        chunk = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return chunk
+
+    def close(self) -> str:
+        return self.flush()
+
+
+class NdjsonEncoder:
+    def __init__(self):
+        self.lines = []
+        self.order = None
+
+    def feed(self, row) -> None:
+        if self.order is None or self.order['id'] != row.id:
+            self.finish_order()
+            self.order = {
+                'id': row.id,
+                'client_id': row.client_id,
+                'status': row.status.value,
+                'total': row.total / 100,
+                'created_at': row.created_at.isoformat(),
+                'items': [],
+            }
+        if row.product_id is not None:
+            self.order['items'].append({
+                'product_id': row.product_id,
+                'quantity': row.quantity,
+                'unit_price': row.unit_price,
+            })
+
+    def finish_order(self) -> None:
+        if self.order is not None:
+            self.lines.append(json.dumps(self.order) + '\n')
+            self.order = None
+
+    def flush(self) -> str:
+        chunk = ''.join(self.lines)
+        self.lines.clear()
+        return chunk
+
+    def close(self) -> str:
+        self.finish_order()
+        return self.flush()
+
+
+ENCODERS = {'csv': CsvEncoder, 'ndjson': NdjsonEncoder}
+
+
+def stream_sync(engine, stmt: Select, export_format: str):
+    # runs in the threadpool while the response is sent; the session is
+    # opened here because the request session is already closed by then
+    encoder = ENCODERS[export_format]()
+    with Session(engine) as session:
+        rows = session.execute(stmt.execution_options(yield_per=YIELD_PER))
+        for count, row in enumerate(rows, start=1):
+            encoder.feed(row)
+            if count % CHUNK_ROWS == 0:
+                yield encoder.flush()
+    yield encoder.close()
+
+
+async def stream_async(engine: AsyncEngine, stmt: Select, export_format: str):
+    encoder = ENCODERS[export_format]()
+    async with AsyncSession(engine) as session:
+        rows = await session.stream(
+            stmt.execution_options(yield_per=YIELD_PER)
+        )
+        count = 0
+        async for row in rows:
+            encoder.feed(row)
+            count += 1
+            if count % CHUNK_ROWS == 0:
+                yield encoder.flush()
+    yield encoder.close()
+
+
+def stream(engine, stmt: Select, export_format: str):
+    stmt = export_statement(stmt)
+    if isinstance(engine, AsyncEngine):
+        return stream_async(engine, stmt, export_format)
+    return stream_sync(engine, stmt, export_format)
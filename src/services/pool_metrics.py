@@ -0,0 +1,92 @@
+from bisect import bisect_left
+from threading import Lock
+from time import perf_counter
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class PoolStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS) + 1)
+        self._lock = Lock()
+
+    def observe_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_buckets[bisect_left(WAIT_BUCKETS, seconds)] += 1
+
+    def observe_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            histogram = {
+                f'le_{bound}': count
+                for bound, count in zip(
+                    (*WAIT_BUCKETS, 'inf'), self.wait_buckets
+                )
+            }
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_seconds_total': round(self.wait_total, 6),
+                'wait_seconds_histogram': histogram,
+            }
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.engines = {}
+        self.stats: dict[str, PoolStats] = {}
+
+    def track(self, name: str, engine) -> None:
+        self.engines[name] = engine
+        self.stats.setdefault(name, PoolStats())
+
+    def for_pool(self, pool) -> PoolStats:
+        return self.stats.setdefault(pool.logging_name, PoolStats())
+
+    def snapshot(self) -> dict:
+        snapshot = {}
+        for name, engine in self.engines.items():
+            pool = engine.pool
+            snapshot[name] = {
+                'size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'checked_in': pool.checkedin(),
+                'overflow': pool.overflow(),
+                **self.stats[name].snapshot(),
+            }
+        return snapshot
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedPoolMixin:
+    def _do_get(self):
+        stats = pool_metrics.for_pool(self)
+        started = perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            stats.observe_timeout()
+            raise
+        stats.observe_wait(perf_counter() - started)
+        return connection
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncPool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
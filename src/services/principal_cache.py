@@ -0,0 +1,109 @@
+"""
+Caches the principal of each token subject for PRINCIPAL_CACHE_TTL_SECONDS.
+
+Entries are dropped when a User is updated or deleted through the ORM.
+Core statements such as update(User) or delete(User) skip the mapper
+events, so after one the cached principal can stay stale until its TTL
+expires. Code that changes users that way must call
+principal_cache.invalidate() for the affected emails, or clear().
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from time import monotonic
+
+from sqlalchemy import event, inspect
+
+from src.models.auth_model import User, UserProfile
+from src.services.settings import Settings
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    name: str
+    email: str
+    profile: UserProfile
+    token_version: int = 0
+
+    @classmethod
+    def from_user(cls, user: User) -> 'Principal':
+        return cls(
+            id=user.id,
+            name=user.name,
+            email=user.email,
+            profile=UserProfile(user.profile),
+            token_version=user.token_version,
+        )
+
+
+class PrincipalCache:
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, Principal]] = (
+            OrderedDict()
+        )
+        self._lock = Lock()
+
+    def get(self, subject: str) -> Principal | None:
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None or entry[0] < monotonic():
+                if entry is not None:
+                    del self._entries[subject]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(subject)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, subject: str, principal: Principal) -> None:
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries[subject] = (monotonic() + self.ttl, principal)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, subject: str) -> None:
+        with self._lock:
+            self._entries.pop(subject, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+settings = Settings()
+principal_cache = PrincipalCache(
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+)
+
+
+# only fired for ORM flushes, see the module docstring
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def invalidate_changed_user(mapper, connection, target: User):
+    # the previous email is still cached if the subject itself changed
+    history = inspect(target).attrs.email.history
+    for email in (*history.deleted, target.email):
+        principal_cache.invalidate(email)
@@ -0,0 +1,155 @@
+import csv
+from datetime import date, datetime
+from functools import lru_cache
+from io import StringIO
+from itertools import batched
+from typing import Iterable
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from src.models.products_model import ImageStatus, Product
+from src.schemas.products_schema import BaseProduct
+from src.utils.validation_errors import validation_errors
+
+IMPORT_BATCH_SIZE = 1000
+
+COLUMNS = (
+    'name',
+    'description',
+    'category',
+    'price',
+    'barcode',
+    'quantity',
+    'expiration',
+    'image',
+    'image_status',
+)
+
+
+@lru_cache(maxsize=4096)
+def parse_expiration(value: str) -> date | str:
+    # a file repeats a handful of dates, each one goes through strptime
+    # once; invalid values are left for BaseProduct to reject
+    try:
+        return datetime.strptime(value, '%d/%m/%Y').date()
+    except ValueError:
+        return value
+
+
+def parse_row(row: dict) -> tuple[dict | None, list[str]]:
+    # the same rules create_product applies to a single product
+    if isinstance(row.get('expiration'), str):
+        row = {**row, 'expiration': parse_expiration(row['expiration'])}
+    try:
+        product = BaseProduct.model_validate(row)
+    except ValidationError as e:
+        return None, validation_errors(e)
+
+    errors = []
+    if product.price < 1:
+        errors.append('Insert a valid price')
+    if product.quantity < 1:
+        errors.append('Insert a valid quantity')
+    if product.expiration < date.today():
+        errors.append('Insert a valid date')
+    if errors:
+        return None, errors
+
+    return {
+        'name': product.name,
+        'description': product.description,
+        'category': product.category,
+        'price': round(product.price * 100),
+        'barcode': product.barcode,
+        'quantity': product.quantity,
+        'expiration': product.expiration,
+        'image': row.get('image') or None,
+        # imported images are already hosted, nothing to upload
+        'image_status': ImageStatus.READY if row.get('image') else None,
+    }, []
+
+
+def csv_value(value):
+    if value is None:
+        return r'\N'
+    # enums are stored by name, like SQLAlchemy does
+    if isinstance(value, ImageStatus):
+        return value.name
+    return value
+
+
+def copy_rows(session: Session, rows: list[dict]) -> None:
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(csv_value(row[column]) for column in COLUMNS)
+    buffer.seek(0)
+
+    cursor = session.connection().connection.cursor()
+    cursor.copy_expert(
+        f'COPY products ({", ".join(COLUMNS)}) '
+        r"FROM STDIN WITH (FORMAT csv, NULL '\N')",
+        buffer,
+    )
+
+
+def load_rows(session: Session, rows: list[dict]) -> None:
+    # COPY is only reachable through psycopg2, any other driver gets a
+    # single executemany per batch
+    if session.get_bind().dialect.driver == 'psycopg2':
+        copy_rows(session, rows)
+    else:
+        session.execute(insert(Product), rows)
+
+
+def import_products(
+    session: Session,
+    lines: Iterable[str],
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> dict:
+    reader = csv.DictReader(lines)
+    seen = set()
+    imported = 0
+    rejected = []
+
+    # the header is line 1
+    for batch in batched(enumerate(reader, start=2), batch_size):
+        valid = []
+        for line, row in batch:
+            product, errors = parse_row(row)
+            if product and product['barcode'] in seen:
+                errors = ['This codebar already exists']
+            if errors:
+                rejected.append({'line': line, 'errors': errors})
+                continue
+            seen.add(product['barcode'])
+            valid.append((line, product))
+
+        registered = set(
+            session.scalars(
+                select(Product.barcode).where(
+                    Product.barcode.in_([
+                        product['barcode'] for _, product in valid
+                    ])
+                )
+            )
+        )
+        rows = []
+        for line, product in valid:
+            if product['barcode'] in registered:
+                rejected.append({
+                    'line': line,
+                    'errors': ['This codebar already exists'],
+                })
+            else:
+                rows.append(product)
+
+        if rows:
+            load_rows(session, rows)
+            session.commit()
+            imported += len(rows)
+
+    rejected.sort(key=lambda row: row['line'])
+    return {'imported': imported, 'rejected': rejected}
@@ -0,0 +1,58 @@
+from itertools import count
+from threading import Lock
+from time import monotonic
+
+PRUNE_THRESHOLD = 1024
+
+
+class ReplicaRouter:
+    def __init__(
+        self,
+        engines: list,
+        eviction_seconds: float,
+        read_after_write_seconds: float,
+    ):
+        self.engines = engines
+        self.eviction_seconds = eviction_seconds
+        self.read_after_write_seconds = read_after_write_seconds
+        self._turn = count()
+        self._evicted_until: dict[int, float] = {}
+        self._writers: dict[str, float] = {}
+        self._lock = Lock()
+
+    def pick(self):
+        now = monotonic()
+        with self._lock:
+            for _ in self.engines:
+                index = next(self._turn) % len(self.engines)
+                if self._evicted_until.get(index, 0) <= now:
+                    return self.engines[index]
+        return None
+
+    def evict(self, engine) -> None:
+        with self._lock:
+            index = self.engines.index(engine)
+            self._evicted_until[index] = monotonic() + self.eviction_seconds
+
+    def note_write(self, writer: str) -> None:
+        now = monotonic()
+        with self._lock:
+            if len(self._writers) > PRUNE_THRESHOLD:
+                self._writers = {
+                    key: until
+                    for key, until in self._writers.items()
+                    if until > now
+                }
+            self._writers[writer] = now + self.read_after_write_seconds
+
+    def wrote_recently(self, writer: str | None) -> bool:
+        if writer is None:
+            return False
+        return self._writers.get(writer, 0) > monotonic()
+
+    def route(self, writer: str | None):
+        # clients that just wrote keep reading from the primary so they
+        # never see a replica that is still behind their own write
+        if not self.engines or self.wrote_recently(writer):
+            return None
+        return self.pick()
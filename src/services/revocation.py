@@ -0,0 +1,50 @@
+from threading import Lock
+from time import monotonic
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.models.auth_model import User
+from src.services.settings import Settings
+
+
+class TokenRevocations:
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self._versions: dict[int, int] = {}
+        self._refreshed_at: float | None = None
+        self._lock = Lock()
+
+    def needs_refresh(self) -> bool:
+        return (
+            self._refreshed_at is None
+            or monotonic() - self._refreshed_at >= self.refresh_interval
+        )
+
+    def refresh(self, session: Session) -> None:
+        # only users that ever revoked their tokens have a version above 0
+        rows = session.execute(
+            select(User.id, User.token_version).where(User.token_version > 0)
+        ).all()
+        with self._lock:
+            self._versions = dict(rows)
+            self._refreshed_at = monotonic()
+
+    def bump(self, user_id: int, version: int) -> None:
+        with self._lock:
+            self._versions[user_id] = max(
+                version, self._versions.get(user_id, 0)
+            )
+
+    def is_current(self, user_id: int, version: int) -> bool:
+        return version >= self._versions.get(user_id, 0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._versions = {}
+            self._refreshed_at = None
+
+
+token_revocations = TokenRevocations(
+    refresh_interval=Settings().TOKEN_REVOCATION_REFRESH_SECONDS
+)
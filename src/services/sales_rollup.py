@@ -0,0 +1,225 @@
+import asyncio
+from collections import Counter, defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+from sqlalchemy import (
+    ColumnElement,
+    and_,
+    case,
+    delete,
+    func,
+    insert,
+    literal,
+    select,
+    true,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from src.models.order_model import Order, OrderItem, OrderStatus
+from src.models.report_model import (
+    CategoryDailySales,
+    ProductDailySales,
+    SalesEvent,
+)
+from src.services.database import engine
+from src.services.settings import Settings
+
+MEASURES = ('revenue', 'units', 'orders')
+FOLD_BATCH_SIZE = 5000
+
+
+def record(session: Session, condition: ColumnElement, sign: int = 1) -> None:
+    # orders only append their own events, the shared daily rows are
+    # written by fold() so orders of the same product or category never
+    # wait on each other
+    day = func.date(Order.created_at)
+    first_in_category = (
+        func.row_number().over(
+            partition_by=(OrderItem.order_id, OrderItem.category),
+            order_by=OrderItem.product_id,
+        )
+        == 1
+    )
+    session.execute(
+        insert(SalesEvent).from_select(
+            [
+                'order_id',
+                'day',
+                'product_id',
+                'category',
+                'revenue',
+                'units',
+                'orders',
+                'category_orders',
+            ],
+            select(
+                OrderItem.order_id,
+                day,
+                OrderItem.product_id,
+                OrderItem.category,
+                func.sum(OrderItem.quantity * OrderItem.unit_price) * sign,
+                func.sum(OrderItem.quantity) * sign,
+                literal(sign),
+                case((first_in_category, sign), else_=0),
+            )
+            .join(Order, Order.id == OrderItem.order_id)
+            .where(condition)
+            .group_by(
+                OrderItem.order_id,
+                day,
+                OrderItem.product_id,
+                OrderItem.category,
+            ),
+        )
+    )
+
+
+def record_orders(session: Session, order_ids, sign: int = 1) -> None:
+    record(session, Order.id.in_(order_ids), sign)
+
+
+def increment(session: Session, table, keys: list[str], totals: dict) -> None:
+    # adds the totals to the existing rows, in key order so concurrent
+    # folds lock the rows in the same order
+    if not totals:
+        return
+
+    dialect = session.get_bind().dialect.name
+    insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+    stmt = insert(table).values([
+        {**dict(zip(keys, key)), **measures}
+        for key, measures in sorted(totals.items())
+    ])
+    session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=keys,
+            set_={
+                measure: getattr(table, measure) + stmt.excluded[measure]
+                for measure in MEASURES
+            },
+        )
+    )
+
+
+def fold_batch(session: Session, batch_size: int) -> int:
+    # the events are claimed by deleting them, a concurrent fold skips
+    # the locked ones instead of counting them twice
+    events = session.execute(
+        delete(SalesEvent)
+        .where(
+            SalesEvent.id.in_(
+                select(SalesEvent.id)
+                .order_by(SalesEvent.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+        )
+        .returning(
+            SalesEvent.day,
+            SalesEvent.product_id,
+            SalesEvent.category,
+            SalesEvent.revenue,
+            SalesEvent.units,
+            SalesEvent.orders,
+            SalesEvent.category_orders,
+        )
+    ).all()
+
+    products, categories = defaultdict(Counter), defaultdict(Counter)
+    for event in events:
+        for totals, orders in (
+            (products[event.day, event.product_id], event.orders),
+            (categories[event.day, event.category], event.category_orders),
+        ):
+            totals['revenue'] += event.revenue
+            totals['units'] += event.units
+            totals['orders'] += orders
+
+    increment(session, ProductDailySales, ['day', 'product_id'], products)
+    increment(session, CategoryDailySales, ['day', 'category'], categories)
+    session.commit()
+    return len(events)
+
+
+def fold(session: Session, batch_size: int = FOLD_BATCH_SIZE) -> int:
+    folded = 0
+    while True:
+        count = fold_batch(session, batch_size)
+        folded += count
+        if count < batch_size:
+            return folded
+
+
+def backfill(
+    session: Session,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> None:
+    # rebuilds the rollups of the period from the orders themselves
+    orders = [Order.status != OrderStatus.CANCELLED]
+    products, categories, events = [true()], [true()], [true()]
+    if date_from:
+        orders.append(Order.created_at >= datetime.combine(date_from, time()))
+        products.append(ProductDailySales.day >= date_from)
+        categories.append(CategoryDailySales.day >= date_from)
+        events.append(SalesEvent.day >= date_from)
+    if date_to:
+        orders.append(
+            Order.created_at
+            < datetime.combine(date_to + timedelta(days=1), time())
+        )
+        products.append(ProductDailySales.day <= date_to)
+        categories.append(CategoryDailySales.day <= date_to)
+        events.append(SalesEvent.day <= date_to)
+
+    session.execute(delete(ProductDailySales).where(*products))
+    session.execute(delete(CategoryDailySales).where(*categories))
+    session.execute(delete(SalesEvent).where(*events))
+    record(session, and_(*orders))
+    session.commit()
+    fold(session)
+
+
+class RollupFolder:
+    def __init__(self, engine, interval: float):
+        self.engine = engine
+        self.interval = interval
+        self.folded = 0
+        self.failed = 0
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def fold(self) -> int:
+        with Session(self.engine) as session:
+            return fold(session)
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.folded += await asyncio.to_thread(self.fold)
+            except Exception:
+                # the events stay in sales_events for the next round
+                self.failed += 1
+
+    def stats(self) -> dict:
+        return {
+            'interval': self.interval,
+            'folded': self.folded,
+            'failed': self.failed,
+        }
+
+
+rollup_folder = RollupFolder(
+    engine=engine, interval=Settings().SALES_ROLLUP_FOLD_SECONDS
+)
@@ -10,8 +10,10 @@ from pwdlib import PasswordHash
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from src.models.auth_model import User
-from src.services.database import get_session
+from src.models.auth_model import User, UserProfile
+from src.services.database import get_session, run_with_session
+from src.services.principal_cache import Principal, principal_cache
+from src.services.revocation import token_revocations
 from src.services.settings import Settings
 
 pwd_context = PasswordHash.recommended()
@@ -40,10 +42,35 @@ def create_access_token(data: dict) -> str:
     return encoded_jwt
 
 
+def token_claims(user: User | Principal) -> dict:
+    claims = {'sub': user.email, 'ver': user.token_version}
+    if settings.JWT_STATELESS:
+        claims.update({
+            'uid': user.id,
+            'name': user.name,
+            'profile': UserProfile(user.profile).value,
+        })
+    return claims
+
+
+def principal_from_claims(payload: dict) -> Principal | None:
+    try:
+        return Principal(
+            id=int(payload['uid']),
+            name=payload['name'],
+            email=payload['sub'],
+            profile=UserProfile(payload['profile']),
+            token_version=int(payload.get('ver', 0)),
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+@run_with_session
 def get_current_user(
     session: Session = Depends(get_session),
     token: str = Depends(oauth2_scheme),
-) -> User:
+) -> Principal:
     credentials_exception = HTTPException(
         status_code=HTTPStatus.UNAUTHORIZED,
         detail='Could not validate credentials',
@@ -67,11 +94,30 @@ def get_current_user(
     except PyJWTError:
         raise credentials_exception
 
-    user = session.scalar(
-        select(User).where(User.email == email),
-    )
+    version = payload.get('ver', 0)
+
+    if settings.JWT_STATELESS:
+        principal = principal_from_claims(payload)
+        if principal:
+            if token_revocations.needs_refresh():
+                token_revocations.refresh(session)
+            if not token_revocations.is_current(principal.id, version):
+                raise credentials_exception
+            return principal
+
+    principal = principal_cache.get(email)
+    if not principal:
+        user = session.scalar(
+            select(User).where(User.email == email),
+        )
+
+        if not user:
+            raise credentials_exception
+
+        principal = Principal.from_user(user)
+        principal_cache.set(email, principal)
 
-    if not user:
+    if version < principal.token_version:
         raise credentials_exception
 
-    return user
+    return principal
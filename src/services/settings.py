@@ -10,6 +10,15 @@ class Settings(BaseSettings):
 
     # DB
     DATABASE_URL: str
+    DATABASE_ASYNC: bool = False
+    DATABASE_POOL_SIZE: int = 10
+    DATABASE_MAX_OVERFLOW: int = 20
+    DATABASE_POOL_TIMEOUT: float = 30
+    DATABASE_POOL_RECYCLE: int = 1800
+    DATABASE_POOL_PRE_PING: bool = True
+    DATABASE_REPLICA_URLS: str = ''
+    DATABASE_REPLICA_EVICTION_SECONDS: int = 30
+    DATABASE_READ_AFTER_WRITE_SECONDS: int = 5
     POSTGRES_DB: str
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
@@ -18,6 +27,33 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+    JWT_STATELESS: bool = False
+    TOKEN_REVOCATION_REFRESH_SECONDS: int = 30
+
+    # Principal cache
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_SIZE: int = 1024
+
+    # Password hashing
+    HASHING_POOL_SIZE: int = 2
+    HASHING_QUEUE_DEPTH: int = 32
+    HASHING_RETRY_AFTER_SECONDS: int = 1
+
+    # Idempotency keys
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+
+    # Sales rollups
+    SALES_ROLLUP_FOLD_SECONDS: float = 5
+
+    # Image uploads
+    IMAGE_UPLOAD_WORKERS: int = 4
+    IMAGE_UPLOAD_QUEUE_DEPTH: int = 16
+    IMAGE_UPLOAD_TIMEOUT_SECONDS: float = 30
+    IMAGE_UPLOAD_RETRIES: int = 2
+    IMAGE_UPLOAD_RETRY_AFTER_SECONDS: int = 1
+    IMAGE_SPOOL_DIR: str = 'image_spool'
+    IMAGE_MAX_SIZE: int = 1600
+    IMAGE_THUMBNAIL_SIZE: int = 320
 
     # Cloudinary
     CLOUDINARY_CLOUD_NAME: str
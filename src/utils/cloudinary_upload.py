@@ -1,19 +1,146 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from http import HTTPStatus
 
+from cloudinary.exceptions import (
+    AlreadyExists,
+    AuthorizationRequired,
+    BadRequest,
+    NotAllowed,
+    NotFound,
+)
 from cloudinary.uploader import upload
-from fastapi import HTTPException, UploadFile
+from fastapi import HTTPException
 
-from . import cloudinary_init
+from src.services.settings import Settings
 
+# rejected by cloudinary itself, sending the same file again won't help
+PERMANENT_ERRORS = (
+    AlreadyExists,
+    AuthorizationRequired,
+    BadRequest,
+    NotAllowed,
+    NotFound,
+)
+RETRY_BACKOFF_SECONDS = 0.5
 
-async def upload_image(image: UploadFile):
-    cloudinary_init()
-    try:
-        upload_result = upload(image.file)
-        file_url = upload_result['secure_url']
-        return file_url
-    except Exception as e:
+
+class UploadPool:
+    def __init__(
+        self,
+        workers: int,
+        queue_depth: int,
+        timeout: float,
+        retries: int,
+        retry_after: int,
+        uploader=upload,
+    ):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_after = retry_after
+        self.uploader = uploader
+        self.pending = 0
+        self.rejected = 0
+        self.failed = 0
+        self._executor: ThreadPoolExecutor | None = None
+        self._abandoned: set[asyncio.Future] = set()
+
+    def start(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix='image-upload'
+            )
+        return self._executor
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def busy(self) -> int:
+        # an attempt that timed out keeps its worker until cloudinary
+        # returns, so it still counts against the bound
+        return self.pending + len(self._abandoned)
+
+    def call(self, loop, started: asyncio.Event, data: bytes) -> dict:
+        loop.call_soon_threadsafe(started.set)
+        return self.uploader(data, timeout=self.timeout)
+
+    async def attempt(self, data: bytes) -> str:
+        # the timeout counts from when a worker picks the upload up, not
+        # while it waits behind other uploads in the executor queue
+        loop = asyncio.get_running_loop()
+        started = asyncio.Event()
+        future = asyncio.wrap_future(
+            self.start().submit(self.call, loop, started, data)
+        )
+        waiting = asyncio.create_task(started.wait())
+        try:
+            await asyncio.wait(
+                {future, waiting}, return_when=asyncio.FIRST_COMPLETED
+            )
+            result = await asyncio.wait_for(
+                asyncio.shield(future), self.timeout
+            )
+        finally:
+            waiting.cancel()
+            if not future.done():
+                self._abandoned.add(future)
+                future.add_done_callback(self._abandoned.discard)
+        return result['secure_url']
+
+    async def run(self, data: bytes) -> str:
+        if self.busy() >= self.workers + self.queue_depth:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                detail='Too many image uploads, try again later',
+                headers={'Retry-After': str(self.retry_after)},
+            )
+
+        self.pending += 1
+        try:
+            for retry in range(self.retries + 1):
+                if retry:
+                    await asyncio.sleep(
+                        RETRY_BACKOFF_SECONDS * 2 ** (retry - 1)
+                    )
+                try:
+                    return await self.attempt(data)
+                except PERMANENT_ERRORS as e:
+                    error = e
+                    break
+                except TimeoutError:
+                    error = f'timed out after {self.timeout}s'
+                except Exception as e:
+                    error = e
+        finally:
+            self.pending -= 1
+
+        self.failed += 1
         raise HTTPException(
             status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
-            detail=f'Error on image upload: {e}',
+            detail=f'Error on image upload: {error}',
         )
+
+    def stats(self) -> dict:
+        return {
+            'workers': self.workers,
+            'queue_depth': self.queue_depth,
+            'pending': self.pending,
+            'abandoned': len(self._abandoned),
+            'rejected': self.rejected,
+            'failed': self.failed,
+        }
+
+
+settings = Settings()
+upload_pool = UploadPool(
+    workers=settings.IMAGE_UPLOAD_WORKERS,
+    queue_depth=settings.IMAGE_UPLOAD_QUEUE_DEPTH,
+    timeout=settings.IMAGE_UPLOAD_TIMEOUT_SECONDS,
+    retries=settings.IMAGE_UPLOAD_RETRIES,
+    retry_after=settings.IMAGE_UPLOAD_RETRY_AFTER_SECONDS,
+)
@@ -1,11 +1,31 @@
-from re import sub
+from re import compile
+from typing import Iterable
+
+NON_DIGITS = compile(r'\D')
 
 
 def clean_cpf(cpf: str) -> str:
-    return sub(r'\D', '', cpf)
+    return NON_DIGITS.sub('', cpf)
+
+
+def check_digit(digits: str) -> str:
+    # weights run from len + 1 down to 2
+    total = sum(
+        int(digit) * weight
+        for digit, weight in zip(digits, range(len(digits) + 1, 1, -1))
+    )
+    return str(total * 10 % 11 % 10)
 
 
 def validate_cpf(cpf: str) -> bool:
-    if len(cpf) != 11 or cpf == cpf[0] * 11:
+    if len(cpf) != 11 or not (cpf.isascii() and cpf.isdigit()):
         return False
-    return True
+    if cpf == cpf[0] * 11:
+        return False
+    return cpf[9] == check_digit(cpf[:9]) and cpf[10] == check_digit(cpf[:10])
+
+
+def check_cpfs(cpfs: Iterable[str]) -> list[tuple[str, bool]]:
+    # cleans a whole batch at once, returning each cleaned cpf with
+    # its validation result
+    return [(cpf, validate_cpf(cpf)) for cpf in map(clean_cpf, cpfs)]
@@ -0,0 +1,72 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as DecodeError
+from http import HTTPStatus
+from json import JSONDecodeError, dumps, loads
+from typing import NamedTuple, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import Select
+from sqlalchemy.orm import InstrumentedAttribute, Session
+
+
+class Page(NamedTuple):
+    items: list
+    next_cursor: Optional[str]
+    previous_cursor: Optional[str]
+
+
+def encode_cursor(key: int) -> str:
+    return urlsafe_b64encode(dumps({'id': key}).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(loads(urlsafe_b64decode(cursor.encode()))['id'])
+    except (DecodeError, JSONDecodeError, KeyError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST, detail='Invalid cursor'
+        )
+
+
+def keyset_page(
+    session: Session,
+    stmt: Select,
+    key: InstrumentedAttribute,
+    limit: int,
+    skip: int = 0,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    descending: bool = False,
+) -> Page:
+    # walking backwards (before) flips the order, the page is reversed
+    # again after fetching so items always come in the listing order
+    backwards = before is not None and after is None
+    forward_order = key.desc() if descending else key.asc()
+    backward_order = key.asc() if descending else key.desc()
+
+    if after is not None:
+        position = decode_cursor(after)
+        stmt = stmt.where(key < position if descending else key > position)
+    elif before is not None:
+        position = decode_cursor(before)
+        stmt = stmt.where(key > position if descending else key < position)
+
+    stmt = stmt.order_by(backward_order if backwards else forward_order)
+    rows = session.scalars(stmt.offset(skip).limit(limit + 1)).all()
+
+    has_more = len(rows) > limit
+    items = list(rows[:limit])
+    if backwards:
+        items.reverse()
+
+    if not items:
+        return Page(items, None, None)
+
+    first = encode_cursor(getattr(items[0], key.key))
+    last = encode_cursor(getattr(items[-1], key.key))
+    if backwards:
+        return Page(items, last, first if has_more else None)
+
+    return Page(
+        items, last if has_more else None, first if after is not None else None
+    )
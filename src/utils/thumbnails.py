@@ -0,0 +1,39 @@
+from io import BytesIO
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+WEBP_QUALITY = 80
+
+
+def encode(image: Image.Image) -> bytes:
+    if image.mode not in {'RGB', 'RGBA'}:
+        image = image.convert('RGBA')
+    buffer = BytesIO()
+    image.save(buffer, format='WEBP', quality=WEBP_QUALITY)
+    return buffer.getvalue()
+
+
+def prepare_images(
+    data: bytes, max_size: int, thumbnail_size: int
+) -> tuple[bytes, bytes]:
+    # returns the image to store, downscaled only when it is larger than
+    # max_size, and its thumbnail
+    try:
+        with Image.open(BytesIO(data)) as original:
+            image = ImageOps.exif_transpose(original)
+            image.load()
+    except (
+        Image.DecompressionBombError,
+        OSError,
+        UnidentifiedImageError,
+    ) as e:
+        raise ValueError('Invalid image file') from e
+
+    full = data
+    if max(image.size) > max_size:
+        resized = image.copy()
+        resized.thumbnail((max_size, max_size))
+        full = encode(resized)
+
+    image.thumbnail((thumbnail_size, thumbnail_size))
+    return full, encode(image)
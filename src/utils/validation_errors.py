@@ -0,0 +1,10 @@
+from typing import List
+
+from pydantic import ValidationError
+
+
+def validation_errors(error: ValidationError) -> List[str]:
+    return [
+        f'{".".join(map(str, detail["loc"]))}: {detail["msg"]}'
+        for detail in error.errors()
+    ]
@@ -1,12 +1,19 @@
+from datetime import date, datetime, time, timedelta
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import Session
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 
 from src.main import app
 from src.models import table_registry
-from src.services.database import get_session
+from src.models.products_model import Product
+from src.services.database import get_read_session, get_session
+from src.services.image_queue import image_queue
+from src.services.principal_cache import principal_cache
+from src.services.revocation import token_revocations
 
 
 @pytest.fixture
@@ -16,12 +23,49 @@ def client(session):
 
     with TestClient(app) as client:
         app.dependency_overrides[get_session] = get_session_override
+        app.dependency_overrides[get_read_session] = get_session_override
+
+        yield client
+
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def async_client(tmp_path):
+    database_url = f'sqlite:///{tmp_path / "async.db"}'
+    table_registry.metadata.create_all(create_engine(database_url))
+    engine = create_async_engine(
+        database_url.replace('sqlite', 'sqlite+aiosqlite'),
+        poolclass=NullPool,
+    )
+
+    async def get_session_override():
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+    with TestClient(app) as client:
+        app.dependency_overrides[get_session] = get_session_override
+        app.dependency_overrides[get_read_session] = get_session_override
 
         yield client
 
     app.dependency_overrides.clear()
 
 
+@pytest.fixture(autouse=True)
+def clear_auth_state():
+    principal_cache.clear()
+    token_revocations.clear()
+    yield
+    principal_cache.clear()
+    token_revocations.clear()
+
+
+@pytest.fixture(autouse=True)
+def image_spool(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_queue, 'spool_dir', tmp_path / 'image_spool')
+
+
 @pytest.fixture
 def session():
     engine = create_engine(
@@ -91,3 +135,36 @@ def sample_client(auth_client):
         },
     )
     return response.json()
+
+
+@pytest.fixture
+def sample_product(session):
+    product = Product(
+        name='Coffee',
+        description='Roasted coffee beans',
+        category='groceries',
+        price=2500,
+        barcode='7891000100103',
+        quantity=10,
+        expiration=datetime.combine(
+            date.today() + timedelta(days=365), time()
+        ),
+        image='https://example.com/coffee.png',
+    )
+    session.add(product)
+    session.commit()
+    session.refresh(product)
+    return product
+
+
+@pytest.fixture
+def count_queries(session):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = session.get_bind()
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    yield statements
+    event.remove(engine, 'before_cursor_execute', before_cursor_execute)
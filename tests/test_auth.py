@@ -1,5 +1,10 @@
+import asyncio
 from http import HTTPStatus
 
+from sqlalchemy.orm import Session
+
+from src.services.hashing import hashing_pool
+
 
 def test_register_user(client):
     user_data = {
@@ -101,3 +106,71 @@ def test_refresh_token(client):
 
     assert response.status_code == HTTPStatus.OK
     assert 'access_token' in response.json()
+
+
+def test_register_rejected_when_hashing_queue_is_full(client, monkeypatch):
+    monkeypatch.setattr(hashing_pool, 'pending', 0)
+    monkeypatch.setattr(hashing_pool, 'workers', 0)
+    monkeypatch.setattr(hashing_pool, 'queue_depth', 0)
+    user_data = {
+        'name': 'Test User',
+        'email': 'test@example.com',
+        'password': 'SecurePass123!',
+    }
+    response = client.post('/auth/register', json=user_data)
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.headers['Retry-After'] == str(hashing_pool.retry_after)
+
+
+def test_register_duplicate_email_is_not_hashed(client, monkeypatch):
+    user_data = {
+        'name': 'Test User',
+        'email': 'test@example.com',
+        'password': 'SecurePass123!',
+    }
+    client.post('/auth/register', json=user_data)
+
+    hashed = []
+    monkeypatch.setattr(hashing_pool, 'run', lambda *args: hashed.append(args))
+    for route in ('/auth/register', '/auth/register-admin'):
+        response = client.post(route, json=user_data)
+
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json()['detail'] == 'Email already registered'
+    assert hashed == []
+
+
+def test_auth_queries_run_off_the_event_loop(client, monkeypatch):
+    # the handlers are async, a sync session called directly would block
+    # every other request while it waits on the database
+    on_loop = []
+
+    def watch(method):
+        def wrapper(*args, **kwargs):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(method.__name__)
+            except RuntimeError:
+                pass
+            return method(*args, **kwargs)
+
+        return wrapper
+
+    for name in ('scalar', 'commit', 'refresh'):
+        monkeypatch.setattr(Session, name, watch(getattr(Session, name)))
+
+    user_data = {
+        'name': 'Test User',
+        'email': 'test@example.com',
+        'password': 'SecurePass123!',
+    }
+    client.post('/auth/register', json=user_data)
+    client.post('/auth/register-admin', json={**user_data, 'email': 'a@b.com'})
+    response = client.post(
+        '/auth/login',
+        data={'username': 'test@example.com', 'password': 'SecurePass123!'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert on_loop == []
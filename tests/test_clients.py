@@ -1,5 +1,21 @@
 from http import HTTPStatus
 
+from sqlalchemy import select
+
+from src.models.client_model import Client
+from src.services.client_import import import_clients
+
+CLIENTS = """name,email,cpf
+Ana,ana@example.com,123.456.789-09
+Bruno,bruno@example.com,111.111.111-11
+Carla,client@example.com,111.444.777-35
+Duda,duda@example.com,52998224725
+Enzo,ana@example.com,390.533.447-05
+Fabi,fabi@example.com,123.456.789-09
+Gabi,not-an-email,714.602.380-01
+Hugo,hugo@example.com,987.654.321-00
+"""
+
 
 def test_create_client_success(auth_client):
     response = auth_client.post(
@@ -29,6 +45,43 @@ def test_create_client_invalid_cpf(auth_client):
     assert 'Invalid CPF' in response.json()['detail']
 
 
+def test_create_client_invalid_check_digits(auth_client):
+    response = auth_client.post(
+        '/clients/',
+        json={
+            'name': 'Test Client',
+            'email': 'invalidcpf@example.com',
+            'cpf': '529.982.247-52',
+        },
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert 'Invalid CPF' in response.json()['detail']
+
+
+def test_create_client_stores_compact_cpf(auth_client, session):
+    auth_client.post(
+        '/clients/',
+        json={
+            'name': 'Test Client',
+            'email': 'newclient@example.com',
+            'cpf': '123.456.789-09',
+        },
+    )
+    response = auth_client.post(
+        '/clients/',
+        json={
+            'name': 'Same CPF',
+            'email': 'samecpf@example.com',
+            'cpf': '12345678909',
+        },
+    )
+
+    assert session.scalar(select(Client.cpf)) == '12345678909'
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert 'CPF already exists' in response.json()['detail']
+
+
 def test_create_client_duplicate_email(auth_client, sample_client):
     response = auth_client.post(
         '/clients/',
@@ -111,7 +164,7 @@ def test_update_inexistent_client(auth_client):
     update_data = {
         'name': 'inexistent',
         'email': 'inexistent@example.com',
-        'cpf': '123.123.123-12',
+        'cpf': '111.444.777-35',
     }
     response = auth_client.put('/clients/1', json=update_data)
 
@@ -132,7 +185,7 @@ def test_update_client_conflict(auth_client, sample_client):
         json={
             'name': 'Conflict 1',
             'email': new_user_data['email'],
-            'cpf': '123.123.123.12',
+            'cpf': '390.533.447-05',
         },
     )
 
@@ -193,3 +246,78 @@ def test_delete_inexistent_client(admin_client):
 
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert 'Client not found' in response.json()['detail']
+
+
+def test_get_all_clients_with_cursor(auth_client):
+    for index, cpf in enumerate([
+        '529.982.247-25',
+        '123.456.789-09',
+        '987.654.321-00',
+    ]):
+        auth_client.post(
+            '/clients/',
+            json={
+                'name': f'Client {index}',
+                'email': f'client{index}@example.com',
+                'cpf': cpf,
+            },
+        )
+
+    first_page = auth_client.get('/clients/?limit=2').json()
+    second_page = auth_client.get(
+        f'/clients/?limit=2&after={first_page["next_cursor"]}'
+    ).json()
+    back_page = auth_client.get(
+        f'/clients/?limit=2&before={second_page["previous_cursor"]}'
+    ).json()
+
+    assert [c['name'] for c in first_page['clients']] == [
+        'Client 0',
+        'Client 1',
+    ]
+    assert [c['name'] for c in second_page['clients']] == ['Client 2']
+    assert second_page['next_cursor'] is None
+    assert back_page['clients'] == first_page['clients']
+
+
+def test_get_all_clients_with_invalid_cursor(auth_client):
+    response = auth_client.get('/clients/?after=not-a-cursor')
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json()['detail'] == 'Invalid cursor'
+
+
+def test_import_clients(auth_client, session, sample_client):
+    response = auth_client.post(
+        '/clients/import',
+        files={'file': ('clients.csv', CLIENTS, 'text/csv')},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'imported': 2,
+        'rejected': [
+            {'line': 3, 'errors': ['Invalid CPF']},
+            {'line': 4, 'errors': ['Email already exists']},
+            {'line': 5, 'errors': ['CPF already exists']},
+            {'line': 6, 'errors': ['Email already exists']},
+            {'line': 7, 'errors': ['CPF already exists']},
+            {
+                'line': 8,
+                'errors': [
+                    'email: value is not a valid email address: '
+                    'An email address must have an @-sign.'
+                ],
+            },
+        ],
+    }
+    assert set(
+        session.scalars(select(Client.email).where(Client.id != 1))
+    ) == {'ana@example.com', 'hugo@example.com'}
+
+
+def test_import_clients_in_batches(session, sample_client):
+    report = import_clients(session, CLIENTS.splitlines(), batch_size=3)
+
+    assert report['imported'] == 2
+    assert [row['line'] for row in report['rejected']] == [3, 4, 5, 6, 7, 8]
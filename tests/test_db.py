@@ -1,6 +1,14 @@
-from sqlalchemy import select
+from http import HTTPStatus
+
+import pytest
+from fastapi import Request
+from sqlalchemy import create_engine, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
 
 from src.models.auth_model import User
+from src.services import database
+from src.services.replicas import ReplicaRouter
 
 
 def test_create_user(session):
@@ -13,3 +21,96 @@ def test_create_user(session):
     user = session.scalar(select(User).where(User.email == 'test@test'))
 
     assert user.email == 'test@test'
+
+
+def test_routes_run_on_async_session(async_client):
+    user_data = {
+        'name': 'Async User',
+        'email': 'async@example.com',
+        'password': 'SecurePass123!',
+    }
+    async_client.post('/auth/register', json=user_data)
+    token = async_client.post(
+        '/auth/login',
+        data={'username': user_data['email'], 'password': 'SecurePass123!'},
+    ).json()['access_token']
+    async_client.headers = {'Authorization': f'Bearer {token}'}
+
+    created = async_client.post(
+        '/clients/',
+        json={
+            'name': 'Async Client',
+            'email': 'client@example.com',
+            'cpf': '529.982.247-25',
+        },
+    )
+    listed = async_client.get('/clients/')
+    orders = async_client.get('/orders/')
+    export = async_client.get('/orders/export?format=csv')
+
+    assert created.status_code == HTTPStatus.CREATED
+    assert listed.json()['clients'][0]['email'] == 'client@example.com'
+    assert orders.json()['orders'] == []
+    assert export.text.startswith('order_id,client_id,status')
+
+
+@pytest.fixture
+def replicas(tmp_path):
+    return [
+        create_engine(f'sqlite:///{tmp_path / f"replica_{index}.db"}')
+        for index in range(2)
+    ]
+
+
+def test_replica_router_round_robin_and_eviction(replicas):
+    router = ReplicaRouter(
+        replicas, eviction_seconds=60, read_after_write_seconds=60
+    )
+
+    assert [router.pick() for _ in range(4)] == replicas * 2
+
+    router.evict(replicas[0])
+    assert {router.pick() for _ in range(4)} == {replicas[1]}
+
+    router.evict(replicas[1])
+    assert router.pick() is None
+
+
+def test_replica_router_read_after_write_goes_to_primary(replicas):
+    router = ReplicaRouter(
+        replicas, eviction_seconds=60, read_after_write_seconds=60
+    )
+    router.note_write('Bearer writer')
+
+    assert router.route('Bearer writer') is None
+    assert router.route('Bearer reader') in replicas
+
+
+def test_read_session_evicts_failing_replica(replicas, monkeypatch):
+    router = ReplicaRouter(
+        replicas, eviction_seconds=60, read_after_write_seconds=60
+    )
+    monkeypatch.setattr(database, 'replica_router', router)
+    request = Request({'type': 'http', 'headers': []})
+
+    dependency = database.get_sync_read_session(request)
+    session = next(dependency)
+    assert session.bind is replicas[0]
+
+    with pytest.raises(OperationalError):
+        dependency.throw(OperationalError('select 1', {}, Exception()))
+
+    assert router.pick() is replicas[1]
+    assert router.pick() is replicas[1]
+
+
+def test_commit_marks_writer_for_read_after_write(replicas, monkeypatch):
+    router = ReplicaRouter(
+        replicas, eviction_seconds=60, read_after_write_seconds=60
+    )
+    monkeypatch.setattr(database, 'replica_router', router)
+
+    with Session(replicas[0], info={'writer': 'Bearer writer'}) as session:
+        session.commit()
+
+    assert router.wrote_recently('Bearer writer')
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+from http import HTTPStatus
+
+from sqlalchemy import func, select
+
+from src.models.idempotency_model import IdempotencyKey
+from src.models.order_model import Order
+from src.services.idempotency import purge_expired
+
+
+def post_order(client, sample_client, sample_product, key, quantity=2):
+    return client.post(
+        '/orders/',
+        json={
+            'client_id': sample_client['id'],
+            'items': [{'product_id': sample_product.id, 'quantity': quantity}],
+        },
+        headers={'Idempotency-Key': key},
+    )
+
+
+def test_replayed_order_is_created_once(
+    auth_client, session, sample_client, sample_product
+):
+    first = post_order(auth_client, sample_client, sample_product, 'abc')
+    second = post_order(auth_client, sample_client, sample_product, 'abc')
+
+    assert first.status_code == second.status_code == HTTPStatus.CREATED
+    assert second.json() == first.json()
+    assert second.headers['Idempotent-Replayed'] == 'true'
+    assert session.scalar(select(func.count()).select_from(Order)) == 1
+    session.refresh(sample_product)
+    assert sample_product.quantity == 8
+
+
+def test_key_reused_with_other_request(
+    auth_client, sample_client, sample_product
+):
+    post_order(auth_client, sample_client, sample_product, 'abc')
+    response = post_order(
+        auth_client, sample_client, sample_product, 'abc', quantity=3
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.json() == {
+        'detail': 'Idempotency-Key already used with a different request'
+    }
+
+
+def test_failed_request_is_not_remembered(
+    auth_client, sample_client, sample_product
+):
+    rejected = post_order(
+        auth_client, sample_client, sample_product, 'abc', quantity=11
+    )
+    accepted = post_order(
+        auth_client, sample_client, sample_product, 'abc', quantity=11
+    )
+
+    assert rejected.status_code == accepted.status_code
+    assert 'Idempotent-Replayed' not in accepted.headers
+
+
+def test_expired_key_runs_again(
+    auth_client, session, sample_client, sample_product
+):
+    post_order(auth_client, sample_client, sample_product, 'abc')
+    stored = session.scalar(select(IdempotencyKey))
+    stored.expires_at = datetime.now() - timedelta(seconds=1)
+    session.commit()
+
+    response = post_order(auth_client, sample_client, sample_product, 'abc')
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert 'Idempotent-Replayed' not in response.headers
+    assert session.scalar(select(func.count()).select_from(Order)) == 2
+
+
+def test_purge_expired(auth_client, session, sample_client, sample_product):
+    post_order(auth_client, sample_client, sample_product, 'old')
+    post_order(auth_client, sample_client, sample_product, 'new')
+    stored = session.get(IdempotencyKey, (1, 'old'))
+    stored.expires_at = datetime.now() - timedelta(seconds=1)
+    session.commit()
+
+    assert purge_expired(session) == 1
+    assert session.scalars(select(IdempotencyKey.key)).all() == ['new']
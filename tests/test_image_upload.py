@@ -0,0 +1,465 @@
+import asyncio
+import time
+from http import HTTPStatus
+from io import BytesIO
+
+import pytest
+from cloudinary.exceptions import BadRequest, GeneralError
+from fastapi import HTTPException
+from PIL import Image
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from src.models.image_model import ImageIndex
+from src.models.products_model import ImageStatus, Product
+from src.services import image_queue as image_queue_module
+from src.services.image_queue import ImageQueue, image_queue
+from src.utils import cloudinary_upload
+from src.utils.cloudinary_upload import UploadPool, upload_pool
+from src.utils.thumbnails import prepare_images
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(cloudinary_upload, 'RETRY_BACKOFF_SECONDS', 0)
+    pool = UploadPool(
+        workers=1, queue_depth=0, timeout=0.5, retries=2, retry_after=1
+    )
+    yield pool
+    pool.shutdown()
+
+
+def test_upload_retries_transient_errors(pool):
+    calls = []
+
+    def uploader(data, timeout):
+        calls.append(data)
+        if len(calls) < 3:
+            raise GeneralError('Server error')
+        return {'secure_url': 'https://x/image.png'}
+
+    pool.uploader = uploader
+
+    assert asyncio.run(pool.run(b'png')) == 'https://x/image.png'
+    assert calls == [b'png'] * 3
+
+
+def test_upload_does_not_retry_rejected_files(pool):
+    calls = []
+
+    def uploader(data, timeout):
+        calls.append(data)
+        raise BadRequest('Invalid image file')
+
+    pool.uploader = uploader
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(pool.run(b'png'))
+
+    assert error.value.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert error.value.detail == 'Error on image upload: Invalid image file'
+    assert len(calls) == 1
+    assert pool.failed == 1
+
+
+def test_upload_times_out_without_blocking_the_loop(pool):
+    pool.retries = 0
+    pool.timeout = 0.2
+
+    def uploader(data, timeout):
+        time.sleep(0.5)
+
+    pool.uploader = uploader
+
+    async def scenario():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        with pytest.raises(HTTPException) as error:
+            await pool.run(b'png')
+        ticker.cancel()
+        return ticks, error.value
+
+    ticks, error = asyncio.run(scenario())
+
+    assert error.detail == 'Error on image upload: timed out after 0.2s'
+    assert ticks > 5
+
+
+def test_upload_rejected_when_queue_is_full(pool):
+    pool.pending = 1
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(pool.run(b'png'))
+
+    assert error.value.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert error.value.headers == {'Retry-After': '1'}
+    assert pool.rejected == 1
+
+
+def test_timed_out_uploads_hold_their_worker(pool):
+    pool.retries = 0
+    pool.timeout = 0.1
+
+    def uploader(data, timeout):
+        time.sleep(0.3)
+        return {'secure_url': 'https://x/image.png'}
+
+    pool.uploader = uploader
+
+    async def scenario():
+        with pytest.raises(HTTPException):
+            await pool.run(b'slow')
+        with pytest.raises(HTTPException) as error:
+            await pool.run(b'png')
+        await asyncio.sleep(0.3)
+        return error.value, pool.busy()
+
+    error, busy = asyncio.run(scenario())
+
+    assert error.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert busy == 0
+
+
+def test_upload_timeout_starts_when_a_worker_is_free(pool):
+    pool.queue_depth = 1
+    pool.retries = 0
+    pool.timeout = 0.3
+
+    def uploader(data, timeout):
+        time.sleep(0.2)
+        return {'secure_url': f'https://x/{data.decode()}.png'}
+
+    pool.uploader = uploader
+
+    async def scenario():
+        return await asyncio.gather(pool.run(b'first'), pool.run(b'second'))
+
+    assert asyncio.run(scenario()) == [
+        'https://x/first.png',
+        'https://x/second.png',
+    ]
+    assert pool.failed == 0
+
+
+def png(width, height, color='green'):
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), color).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def sized_uploader(calls):
+    # the stand-in names each upload after the size it received
+    def uploader(data, timeout):
+        with Image.open(BytesIO(data)) as image:
+            calls.append(image.size)
+            return {'secure_url': f'https://x/{image.width}x{image.height}'}
+
+    return uploader
+
+
+def create_product(auth_client, image, barcode='7891000100200'):
+    return auth_client.post(
+        '/products/',
+        data={
+            'name': 'Tea',
+            'description': 'Green tea',
+            'category': 'groceries',
+            'price': 10.5,
+            'barcode': barcode,
+            'quantity': 3,
+            'expiration': '01/01/2099',
+        },
+        files={'image': ('tea.png', image, 'image/png')},
+    )
+
+
+def wait_for_image(session, product_id):
+    for _ in range(100):
+        image, thumbnail, status = session.execute(
+            select(
+                Product.image, Product.thumbnail, Product.image_status
+            ).where(Product.id == product_id)
+        ).one()
+        if status != ImageStatus.PENDING:
+            return image, thumbnail, status
+        time.sleep(0.02)
+    raise AssertionError('image still pending')
+
+
+def test_create_product_defers_image_upload(auth_client, session, monkeypatch):
+    calls = []
+    monkeypatch.setattr(upload_pool, 'uploader', sized_uploader(calls))
+    monkeypatch.setattr(image_queue, 'engine', session.get_bind())
+    response = create_product(auth_client, png(2000, 1000))
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json()['image_status'] == 'pending'
+    assert response.json()['image'] is None
+    assert wait_for_image(session, response.json()['id']) == (
+        'https://x/1600x800',
+        'https://x/320x160',
+        ImageStatus.READY,
+    )
+    assert sorted(calls) == [(320, 160), (1600, 800)]
+
+
+def test_identical_images_are_uploaded_once(auth_client, session, monkeypatch):
+    calls = []
+    monkeypatch.setattr(upload_pool, 'uploader', sized_uploader(calls))
+    monkeypatch.setattr(image_queue, 'engine', session.get_bind())
+    image = png(400, 400)
+    first = create_product(auth_client, image).json()
+    second = create_product(auth_client, image, barcode='7891000100201').json()
+
+    assert wait_for_image(session, first['id']) == wait_for_image(
+        session, second['id']
+    )
+    assert sorted(calls) == [(320, 320), (400, 400)]
+    assert session.scalar(select(ImageIndex.url)) == 'https://x/400x400'
+
+
+def test_small_images_are_uploaded_as_sent():
+    image = png(800, 600)
+
+    full, thumbnail = prepare_images(image, 1600, 320)
+
+    assert full == image
+    assert Image.open(BytesIO(thumbnail)).size == (320, 240)
+
+
+def test_invalid_image_is_not_uploaded(auth_client, session, monkeypatch):
+    calls = []
+    monkeypatch.setattr(upload_pool, 'uploader', sized_uploader(calls))
+    monkeypatch.setattr(image_queue, 'engine', session.get_bind())
+    response = create_product(auth_client, b'not an image')
+
+    assert wait_for_image(session, response.json()['id']) == (
+        None,
+        None,
+        ImageStatus.FAILED,
+    )
+    assert calls == []
+
+
+def test_failed_image_upload_marks_product(auth_client, session, monkeypatch):
+    def uploader(data, timeout):
+        raise BadRequest('Invalid image file')
+
+    monkeypatch.setattr(upload_pool, 'uploader', uploader)
+    monkeypatch.setattr(image_queue, 'engine', session.get_bind())
+    response = create_product(auth_client, png(10, 10))
+
+    assert wait_for_image(session, response.json()['id']) == (
+        None,
+        None,
+        ImageStatus.FAILED,
+    )
+
+
+def spooled_queue(session, product, tmp_path, retries):
+    product.image_status = ImageStatus.PENDING
+    session.commit()
+    queue = ImageQueue(
+        tmp_path / 'spool', 1, session.get_bind(), 1600, 320, retries=retries
+    )
+    queue.spool_dir.mkdir()
+    queue.spool_path(product.id).write_bytes(png(10, 10))
+    return queue
+
+
+def run_queue(queue):
+    async def scenario():
+        queue.start()
+        await queue.join()
+        await queue.stop()
+
+    asyncio.run(scenario())
+
+
+def test_spooled_images_are_uploaded_on_start(
+    session, sample_product, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(upload_pool, 'uploader', sized_uploader([]))
+    queue = spooled_queue(session, sample_product, tmp_path, retries=0)
+    run_queue(queue)
+
+    assert wait_for_image(session, sample_product.id) == (
+        'https://x/10x10',
+        'https://x/10x10',
+        ImageStatus.READY,
+    )
+    assert not any(queue.spool_dir.iterdir())
+
+
+def test_products_list_links_thumbnails(auth_client, session, sample_product):
+    sample_product.thumbnail = 'https://example.com/coffee-thumb.webp'
+    session.add(
+        Product(
+            name='Tea',
+            description='Green tea',
+            category='groceries',
+            price=1000,
+            barcode='7891000100200',
+            quantity=1,
+            expiration=sample_product.expiration,
+            image='https://example.com/tea.png',
+        )
+    )
+    session.commit()
+
+    products = auth_client.get('/products/').json()['products']
+
+    assert [product['preview'] for product in products] == [
+        'https://example.com/coffee-thumb.webp',
+        'https://example.com/tea.png',
+    ]
+    assert products[0]['image'] == sample_product.image
+    assert products[0]['thumbnail'] == 'https://example.com/coffee-thumb.webp'
+
+
+def test_queue_retries_transient_errors(
+    session, sample_product, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(image_queue_module, 'RETRY_BACKOFF_SECONDS', 0)
+    monkeypatch.setattr(upload_pool, 'uploader', sized_uploader([]))
+    queue = spooled_queue(session, sample_product, tmp_path, retries=2)
+    save = queue.save
+    calls = []
+
+    def flaky_save(*args):
+        calls.append(args)
+        if len(calls) == 1:
+            raise ConnectionError('database unavailable')
+        save(*args)
+
+    monkeypatch.setattr(queue, 'save', flaky_save)
+    run_queue(queue)
+
+    assert wait_for_image(session, sample_product.id)[2] == ImageStatus.READY
+    assert queue.retried == 1
+    assert not any(queue.spool_dir.iterdir())
+
+
+def test_queue_requeues_images_when_upload_pool_is_full(
+    session, sample_product, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(image_queue_module, 'RETRY_BACKOFF_SECONDS', 0)
+    queue = spooled_queue(session, sample_product, tmp_path, retries=0)
+    calls = []
+
+    async def run(data):
+        calls.append(data)
+        if len(calls) <= 2:
+            raise HTTPException(
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                detail='Too many image uploads, try again later',
+            )
+        return 'https://x/image.png'
+
+    monkeypatch.setattr(upload_pool, 'run', run)
+    run_queue(queue)
+
+    assert wait_for_image(session, sample_product.id)[2] == ImageStatus.READY
+    assert (queue.requeued, queue.failed) == (1, 0)
+
+
+def test_queue_marks_product_failed_after_retries(
+    session, sample_product, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(image_queue_module, 'RETRY_BACKOFF_SECONDS', 0)
+    queue = spooled_queue(session, sample_product, tmp_path, retries=2)
+
+    def broken_index(content_hash):
+        raise ConnectionError('database unavailable')
+
+    monkeypatch.setattr(queue, 'indexed', broken_index)
+    run_queue(queue)
+
+    assert wait_for_image(session, sample_product.id) == (
+        None,
+        None,
+        ImageStatus.FAILED,
+    )
+    assert (queue.retried, queue.failed) == (2, 1)
+    assert not any(queue.spool_dir.iterdir())
+
+
+def test_spool_skips_stray_and_unfinished_files(
+    session, sample_product, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(upload_pool, 'uploader', sized_uploader([]))
+    queue = spooled_queue(session, sample_product, tmp_path, retries=0)
+    (queue.spool_dir / '.DS_Store').write_bytes(b'')
+    (queue.spool_dir / '.7.tmp').write_bytes(b'truncated')
+    run_queue(queue)
+
+    assert wait_for_image(session, sample_product.id)[2] == ImageStatus.READY
+    assert sorted(path.name for path in queue.spool_dir.iterdir()) == [
+        '.7.tmp',
+        '.DS_Store',
+    ]
+
+
+def test_spool_write_replaces_the_file_whole(tmp_path):
+    queue = ImageQueue(tmp_path / 'spool', 1, None, 1600, 320, retries=0)
+
+    queue.write(5, b'first')
+    queue.write(5, b'second')
+
+    assert [path.name for path in queue.spool_dir.iterdir()] == ['5']
+    assert queue.spool_path(5).read_bytes() == b'second'
+
+
+def test_queue_keeps_results_of_other_processes(
+    session, sample_product, tmp_path, monkeypatch
+):
+    def uploader(data, timeout):
+        raise BadRequest('Invalid image file')
+
+    monkeypatch.setattr(upload_pool, 'uploader', uploader)
+    queue = spooled_queue(session, sample_product, tmp_path, retries=0)
+    # another process sharing the spool uploaded it already
+    sample_product.image_status = ImageStatus.READY
+    session.commit()
+
+    async def scenario():
+        queue.start()
+        queue.enqueue(sample_product.id + 1)
+        await queue.join()
+        await queue.stop()
+
+    asyncio.run(scenario())
+
+    assert wait_for_image(session, sample_product.id) == (
+        'https://example.com/coffee.png',
+        None,
+        ImageStatus.READY,
+    )
+    assert queue.retried == 0
+
+
+def test_failed_product_creation_discards_the_spooled_image(
+    auth_client, monkeypatch
+):
+    monkeypatch.setattr(image_queue, 'enqueue', lambda product_id: None)
+    create_product(auth_client, png(10, 10))
+
+    duplicate = create_product(auth_client, png(10, 10))
+
+    def commit(session):
+        raise OperationalError('COMMIT', {}, Exception('connection lost'))
+
+    monkeypatch.setattr(Session, 'commit', commit)
+    with pytest.raises(OperationalError):
+        create_product(auth_client, png(10, 10), barcode='7891000100201')
+
+    assert duplicate.status_code == HTTPStatus.BAD_REQUEST
+    assert [path.name for path in image_queue.spool_dir.iterdir()] == ['1']
@@ -0,0 +1,111 @@
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import select
+
+from src.models.products_model import ProductStockShard
+from src.services import inventory
+
+
+def shard_quantities(session, product):
+    return session.scalars(
+        select(ProductStockShard.quantity)
+        .where(ProductStockShard.product_id == product.id)
+        .order_by(ProductStockShard.shard)
+    ).all()
+
+
+def test_reserve_decrements_stock(session, sample_product):
+    inventory.reserve(session, {sample_product.id: 4})
+    session.commit()
+
+    assert sample_product.quantity == 6
+
+
+def test_reserve_fails_on_shortfall(session, sample_product):
+    with pytest.raises(inventory.InsufficientStock) as error:
+        inventory.reserve(session, {sample_product.id: 11})
+
+    session.rollback()
+    assert error.value.product_id == sample_product.id
+    assert sample_product.quantity == 10
+
+
+def test_shard_stock_splits_quantity(session, sample_product):
+    inventory.shard_stock(session, sample_product, 3, 10)
+    session.commit()
+
+    assert shard_quantities(session, sample_product) == [4, 3, 3]
+    assert sample_product.stock == 10
+
+
+def test_reserve_from_shards_drains_when_no_shard_covers(
+    session, sample_product
+):
+    inventory.shard_stock(session, sample_product, 3, 10)
+
+    inventory.reserve(session, {sample_product.id: 9}, {sample_product.id: 3})
+    session.commit()
+
+    assert sum(shard_quantities(session, sample_product)) == 1
+    assert sample_product.stock == 1
+
+
+def test_reserve_from_shards_fails_on_shortfall(session, sample_product):
+    inventory.shard_stock(session, sample_product, 3, 10)
+
+    with pytest.raises(inventory.InsufficientStock):
+        inventory.reserve(
+            session, {sample_product.id: 11}, {sample_product.id: 3}
+        )
+
+
+def test_update_stock_shards(admin_client, sample_product):
+    client_id = admin_client.post(
+        '/clients/',
+        json={
+            'name': 'Client',
+            'email': 'client@example.com',
+            'cpf': '529.982.247-25',
+        },
+    ).json()['id']
+    response = admin_client.put(
+        f'/products/{sample_product.id}/stock-shards', json={'shards': 4}
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['quantity'] == 10
+
+    admin_client.post(
+        '/orders/',
+        json={
+            'client_id': client_id,
+            'items': [{'product_id': sample_product.id, 'quantity': 3}],
+        },
+    )
+    response = admin_client.put(
+        f'/products/{sample_product.id}/stock-shards', json={'shards': 0}
+    )
+
+    assert response.json()['quantity'] == 7
+
+
+def test_update_stock_shards_requires_admin(auth_client, sample_product):
+    response = auth_client.put(
+        f'/products/{sample_product.id}/stock-shards', json={'shards': 4}
+    )
+
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+def test_reserve_from_shards_drain_reads_fresh_quantities(
+    session, sample_product
+):
+    inventory.shard_stock(session, sample_product, 3, 10)
+    loaded = session.scalars(select(ProductStockShard)).all()
+    inventory.take_from_shard(session, sample_product.id, 0, 4)
+
+    inventory.reserve(session, {sample_product.id: 5}, {sample_product.id: 3})
+    session.commit()
+
+    assert len(loaded) == 3
+    assert shard_quantities(session, sample_product) == [0, 0, 1]
@@ -0,0 +1,46 @@
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import create_engine, exc
+
+from src.services.pool_metrics import InstrumentedQueuePool, pool_metrics
+
+
+def test_metrics_as_admin(admin_client):
+    response = admin_client.get('/metrics/')
+
+    assert response.status_code == HTTPStatus.OK
+    assert 'primary' in response.json()['database_pools']
+    assert response.json()['principal_cache']['misses'] >= 1
+
+
+def test_metrics_as_normal_user(auth_client):
+    response = auth_client.get('/metrics/')
+
+    assert response.status_code == HTTPStatus.FORBIDDEN
+    assert 'Not enough permission' in response.json()['detail']
+
+
+def test_pool_metrics_record_waits_and_timeouts(tmp_path, monkeypatch):
+    # copies, so the test pool is gone from both once the test ends
+    monkeypatch.setattr(pool_metrics, 'engines', dict(pool_metrics.engines))
+    monkeypatch.setattr(pool_metrics, 'stats', dict(pool_metrics.stats))
+    engine = create_engine(
+        f'sqlite:///{tmp_path / "pool.db"}',
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name='test_pool',
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.01,
+    )
+    pool_metrics.track('test_pool', engine)
+
+    with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+        stats = pool_metrics.snapshot()['test_pool']
+
+    assert stats['checked_out'] == 1
+    assert stats['checkouts'] == 1
+    assert stats['timeouts'] == 1
+    assert sum(stats['wait_seconds_histogram'].values()) == 1
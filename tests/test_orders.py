@@ -0,0 +1,365 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from http import HTTPStatus
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from src.models import table_registry
+from src.models.client_model import Client
+from src.models.order_model import Order
+from src.models.products_model import Product
+from src.routers.orders_routes import place_order
+from src.schemas.order_schema import OrderCreate, OrderItemCreate
+
+LIST_QUERY_BUDGET = 2
+DETAIL_QUERY_BUDGET = 1
+
+
+def create_orders(client, sample_client, sample_product, count):
+    for _ in range(count):
+        client.post(
+            '/orders/',
+            json={
+                'client_id': sample_client['id'],
+                'items': [{'product_id': sample_product.id, 'quantity': 1}],
+            },
+        )
+
+
+def test_create_order(auth_client, sample_client, sample_product):
+    response = auth_client.post(
+        '/orders/',
+        json={
+            'client_id': sample_client['id'],
+            'items': [{'product_id': sample_product.id, 'quantity': 2}],
+        },
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json()['items'] == [
+        {'product_id': sample_product.id, 'quantity': 2, 'unit_price': 2500}
+    ]
+
+
+def test_get_one_order(auth_client, sample_client, sample_product):
+    create_orders(auth_client, sample_client, sample_product, 1)
+
+    response = auth_client.get('/orders/1')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['id'] == 1
+    assert len(response.json()['items']) == 1
+
+
+def test_list_orders_query_budget(
+    auth_client, sample_client, sample_product, count_queries
+):
+    create_orders(auth_client, sample_client, sample_product, 5)
+
+    count_queries.clear()
+    response = auth_client.get('/orders/?limit=100')
+
+    assert len(response.json()['orders']) == 5
+    assert len(count_queries) <= LIST_QUERY_BUDGET
+
+
+def test_get_one_order_query_budget(
+    auth_client, sample_client, sample_product, count_queries
+):
+    create_orders(auth_client, sample_client, sample_product, 1)
+
+    count_queries.clear()
+    response = auth_client.get('/orders/1')
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(count_queries) <= DETAIL_QUERY_BUDGET
+
+
+def test_create_order_round_trips(
+    auth_client, session, sample_client, sample_product, count_queries
+):
+    products = [sample_product]
+    for index in range(4):
+        product = Product(
+            name=f'Tea {index}',
+            description='Green tea',
+            category='groceries',
+            price=1000,
+            barcode=f'789100010020{index}',
+            quantity=10,
+            expiration=datetime.now() + timedelta(days=365),
+            image='https://example.com/tea.png',
+        )
+        session.add(product)
+        products.append(product)
+    session.commit()
+    product_ids = [product.id for product in products]
+
+    def statements_for(cart):
+        count_queries.clear()
+        response = auth_client.post(
+            '/orders/',
+            json={
+                'client_id': sample_client['id'],
+                'items': [
+                    {'product_id': product_id, 'quantity': 1}
+                    for product_id in cart
+                ],
+            },
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        return list(count_queries)
+
+    # only the conditional stock decrement runs once per product
+    single = statements_for(product_ids[:1])
+    whole_cart = statements_for(product_ids)
+    extra = len(whole_cart) - len(single)
+
+    assert extra == len(product_ids) - 1
+    assert sum(s.startswith('UPDATE products') for s in whole_cart) == len(
+        product_ids
+    )
+
+
+def test_create_order_rejects_cart_above_stock(
+    auth_client, sample_client, sample_product
+):
+    response = auth_client.post(
+        '/orders/',
+        json={
+            'client_id': sample_client['id'],
+            'items': [
+                {'product_id': sample_product.id, 'quantity': 6},
+                {'product_id': sample_product.id, 'quantity': 6},
+            ],
+        },
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Not enough Coffee in stock'}
+
+
+def test_concurrent_orders_do_not_oversell(tmp_path):
+    engine = create_engine(
+        f'sqlite:///{tmp_path / "orders.db"}',
+        connect_args={'check_same_thread': False, 'timeout': 30},
+    )
+
+    table_registry.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Client(name='Client', email='client@example.com', cpf='1'))
+        session.add(
+            Product(
+                name='Coffee',
+                description='Roasted coffee beans',
+                category='groceries',
+                price=2500,
+                barcode='7891000100103',
+                quantity=10,
+                expiration=datetime.now() + timedelta(days=365),
+                image='https://example.com/coffee.png',
+            )
+        )
+        session.commit()
+
+    cart = OrderCreate(
+        client_id=1, items=[OrderItemCreate(product_id=1, quantity=3)]
+    )
+
+    def buy(_):
+        with Session(engine) as session:
+            try:
+                place_order(session, cart)
+                session.commit()
+                return True
+            except HTTPException:
+                session.rollback()
+                return False
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        sold = sum(executor.map(buy, range(8)))
+
+    with Session(engine) as session:
+        remaining = session.get(Product, 1).quantity
+        orders = session.scalar(select(func.count()).select_from(Order))
+
+    assert sold == orders == 3
+    assert remaining == 10 - 3 * sold
+
+
+def test_create_orders_bulk(
+    auth_client, session, sample_client, sample_product
+):
+    order = {
+        'client_id': sample_client['id'],
+        'items': [{'product_id': sample_product.id, 'quantity': 4}],
+    }
+    response = auth_client.post(
+        '/orders/bulk',
+        json={
+            'orders': [
+                order,
+                {
+                    'client_id': sample_client['id'],
+                    'items': [{'product_id': 999, 'quantity': 1}],
+                },
+                order,
+                {**order, 'client_id': 999},
+                order,
+            ]
+        },
+    )
+
+    results = response.json()['results']
+    assert response.status_code == HTTPStatus.OK
+    assert [result['created'] for result in results] == [
+        True,
+        False,
+        True,
+        False,
+        False,
+    ]
+    assert results[0]['order']['items'] == [
+        {'product_id': sample_product.id, 'quantity': 4, 'unit_price': 2500}
+    ]
+    assert results[1]['detail'] == 'Item 999 not found'
+    assert results[3]['detail'] == 'Client 999 not found'
+    assert results[4]['detail'] == 'Not enough Coffee in stock'
+
+    session.refresh(sample_product)
+    assert sample_product.quantity == 2
+    assert session.scalar(select(func.count()).select_from(Order)) == 2
+
+
+def test_update_order_follows_transitions(
+    auth_client, sample_client, sample_product
+):
+    create_orders(auth_client, sample_client, sample_product, 1)
+
+    shipped = auth_client.put('/orders/1', json={'status': 'shipped'})
+    processing = auth_client.put('/orders/1', json={'status': 'processing'})
+
+    assert shipped.status_code == HTTPStatus.BAD_REQUEST
+    assert shipped.json() == {
+        'detail': 'Cannot change order status from pending to shipped'
+    }
+    assert processing.status_code == HTTPStatus.OK
+    assert processing.json()['status'] == 'processing'
+
+
+def test_cancel_order_restores_stock(
+    auth_client, session, sample_client, sample_product
+):
+    create_orders(auth_client, sample_client, sample_product, 2)
+
+    response = auth_client.put('/orders/1', json={'status': 'canceled'})
+    reopened = auth_client.put('/orders/1', json={'status': 'pending'})
+
+    assert response.json()['status'] == 'canceled'
+    assert reopened.status_code == HTTPStatus.BAD_REQUEST
+    session.refresh(sample_product)
+    assert sample_product.quantity == 9
+
+
+def test_update_orders_status_bulk(
+    auth_client, session, sample_client, sample_product, count_queries
+):
+    create_orders(auth_client, sample_client, sample_product, 3)
+    auth_client.put('/orders/2', json={'status': 'canceled'})
+
+    count_queries.clear()
+    response = auth_client.patch(
+        '/orders/status',
+        json={'order_ids': [1, 2, 3, 99], 'status': 'canceled'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['results'] == [
+        {'order_id': 1, 'updated': True, 'detail': None},
+        {'order_id': 2, 'updated': False, 'detail': 'Order already canceled'},
+        {'order_id': 3, 'updated': True, 'detail': None},
+        {'order_id': 99, 'updated': False, 'detail': 'Order not found'},
+    ]
+    assert sum(s.startswith('UPDATE orders') for s in count_queries) == 1
+    session.refresh(sample_product)
+    assert sample_product.quantity == 10
+
+
+def test_list_orders_by_statuses_and_dates(
+    auth_client, session, sample_client, sample_product
+):
+    create_orders(auth_client, sample_client, sample_product, 3)
+    auth_client.put('/orders/2', json={'status': 'processing'})
+    auth_client.put('/orders/3', json={'status': 'canceled'})
+    session.get(Order, 1).created_at = datetime(2024, 1, 10)
+    session.commit()
+
+    def order_ids(query):
+        response = auth_client.get(f'/orders/?{query}')
+        return [order['id'] for order in response.json()['orders']]
+
+    assert order_ids('status=pending,processing') == [2, 1]
+    assert order_ids('status=canceled') == [3]
+    assert order_ids('created_from=2024-01-01&created_to=2024-02-01') == [1]
+    assert order_ids('status=pending&created_from=2024-02-01') == []
+
+
+def test_list_orders_invalid_status(auth_client):
+    response = auth_client.get('/orders/?status=pend')
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_export_orders_csv(auth_client, sample_client, sample_product):
+    create_orders(auth_client, sample_client, sample_product, 2)
+
+    response = auth_client.get('/orders/export?format=csv')
+
+    lines = response.text.splitlines()
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/csv')
+    assert lines[0] == (
+        'order_id,client_id,status,total,created_at,'
+        'product_id,quantity,unit_price'
+    )
+    assert [line.split(',')[0] for line in lines[1:]] == ['1', '2']
+    assert lines[1].split(',')[5:] == [str(sample_product.id), '1', '2500']
+
+
+def test_export_orders_ndjson(
+    auth_client, session, sample_client, sample_product
+):
+    tea = Product(
+        name='Tea',
+        description='Green tea',
+        category='groceries',
+        price=1000,
+        barcode='7891000100200',
+        quantity=10,
+        expiration=datetime.now() + timedelta(days=365),
+        image='https://example.com/tea.png',
+    )
+    session.add(tea)
+    session.commit()
+    auth_client.post(
+        '/orders/',
+        json={
+            'client_id': sample_client['id'],
+            'items': [
+                {'product_id': sample_product.id, 'quantity': 1},
+                {'product_id': tea.id, 'quantity': 2},
+            ],
+        },
+    )
+    create_orders(auth_client, sample_client, sample_product, 1)
+    auth_client.put('/orders/2', json={'status': 'canceled'})
+
+    response = auth_client.get('/orders/export?format=ndjson&status=pending')
+
+    [order] = [json.loads(line) for line in response.text.splitlines()]
+    assert order['id'] == 1
+    assert order['total'] == 45.0
+    assert [item['quantity'] for item in order['items']] == [1, 2]
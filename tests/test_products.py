@@ -0,0 +1,130 @@
+from http import HTTPStatus
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import select
+
+from src.models.products_model import Product
+from src.schemas.products_schema import BaseProduct
+from src.services.product_import import import_products
+
+CATALOG = """name,description,category,price,barcode,quantity,expiration,image
+Tea,"Green, tea",groceries,10.5,7891000100200,5,01/01/2099,
+Milk,Whole milk,groceries,0,7891000100201,5,01/01/2099,
+Sugar,Refined,groceries,4,7891000100200,5,01/01/2099,
+Rice,White rice,groceries,7,7891000100103,5,01/01/2099,
+Beans,Black beans,groceries,8,7891000100202,5,2099-01-01,
+Salt,Sea salt,groceries,3,7891000100203,5,01/01/2099,https://x/salt.png
+"""
+
+
+def test_import_products(auth_client, session, sample_product):
+    response = auth_client.post(
+        '/products/import',
+        files={'file': ('catalog.csv', CATALOG, 'text/csv')},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'imported': 2,
+        'rejected': [
+            {'line': 3, 'errors': ['Insert a valid price']},
+            {'line': 4, 'errors': ['This codebar already exists']},
+            {'line': 5, 'errors': ['This codebar already exists']},
+            {
+                'line': 6,
+                'errors': [
+                    'expiration: Value error, '
+                    'The data must be in the format dd/mm/yyyy'
+                ],
+            },
+        ],
+    }
+    tea, salt = session.scalars(
+        select(Product).where(Product.id != sample_product.id)
+    )
+    assert (tea.name, tea.price, tea.image) == ('Tea', 1050, None)
+    assert salt.image == 'https://x/salt.png'
+
+
+def test_import_products_in_batches(session, sample_product):
+    report = import_products(session, CATALOG.splitlines(), batch_size=2)
+
+    assert report['imported'] == 2
+    assert [row['line'] for row in report['rejected']] == [3, 4, 5, 6]
+
+
+def test_create_product_barcode_conflict(auth_client, sample_product):
+    # rejected by the unique constraint before the image is uploaded
+    response = auth_client.post(
+        '/products/',
+        data={
+            'name': 'Coffee 2',
+            'description': 'Same barcode',
+            'category': 'groceries',
+            'price': 10,
+            'barcode': sample_product.barcode,
+            'quantity': 1,
+            'expiration': '01/01/2099',
+        },
+        files={'image': ('coffee.png', b'png', 'image/png')},
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'This codebar already exists'}
+
+
+def test_update_product_barcode_conflict(auth_client, session, sample_product):
+    other = Product(
+        name='Tea',
+        description='Green tea',
+        category='groceries',
+        price=1000,
+        barcode='7891000100200',
+        quantity=1,
+        expiration=sample_product.expiration,
+        image=None,
+    )
+    session.add(other)
+    session.commit()
+
+    response = auth_client.put(
+        f'/products/{other.id}?product_id={other.id}',
+        json={
+            'name': 'Tea',
+            'description': 'Green tea',
+            'category': 'groceries',
+            'price': 10,
+            'barcode': sample_product.barcode,
+            'quantity': 1,
+            'expiration': '01/01/2099',
+        },
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert (
+        session.scalar(select(Product.barcode).where(Product.id == other.id))
+        == '7891000100200'
+    )
+
+
+def test_expiration_accepts_only_dd_mm_yyyy():
+    product = {
+        'name': 'Tea',
+        'description': 'Green tea',
+        'category': 'groceries',
+        'price': 10.5,
+        'barcode': '7891000100200',
+        'quantity': 3,
+    }
+
+    for value in ('+1/ 1/2030', '1_0/01/2030', '2030-01-01'):
+        with pytest.raises(ValidationError):
+            BaseProduct.model_validate({**product, 'expiration': value})
+    assert (
+        BaseProduct.model_validate({
+            **product,
+            'expiration': '10/01/2030',
+        }).expiration.isoformat()
+        == '2030-01-10'
+    )
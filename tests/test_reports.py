@@ -0,0 +1,127 @@
+from datetime import date
+from http import HTTPStatus
+
+from sqlalchemy import func, select
+
+from src.models.report_model import ProductDailySales, SalesEvent
+from src.services.sales_rollup import backfill, fold
+
+
+def create_order(client, sample_client, sample_product, quantity):
+    client.post(
+        '/orders/',
+        json={
+            'client_id': sample_client['id'],
+            'items': [{'product_id': sample_product.id, 'quantity': quantity}],
+        },
+    )
+
+
+def test_sales_by_product(auth_client, session, sample_client, sample_product):
+    create_order(auth_client, sample_client, sample_product, 2)
+    create_order(auth_client, sample_client, sample_product, 3)
+    fold(session)
+
+    response = auth_client.get('/reports/sales')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['sales'] == [
+        {
+            'day': response.json()['sales'][0]['day'],
+            'product_id': sample_product.id,
+            'category': None,
+            'revenue': 125.0,
+            'units': 5,
+            'orders': 2,
+        }
+    ]
+
+
+def test_cancelled_orders_leave_the_rollups(
+    auth_client, session, sample_client, sample_product
+):
+    create_order(auth_client, sample_client, sample_product, 2)
+    create_order(auth_client, sample_client, sample_product, 3)
+    fold(session)
+    auth_client.put('/orders/2', json={'status': 'canceled'})
+    fold(session)
+
+    response = auth_client.get('/reports/sales?group_by=category')
+
+    [row] = response.json()['sales']
+    assert row['category'] == 'groceries'
+    assert (row['revenue'], row['units'], row['orders']) == (50.0, 2, 1)
+
+
+def test_sales_date_range(auth_client, sample_client, sample_product):
+    create_order(auth_client, sample_client, sample_product, 2)
+
+    response = auth_client.get('/reports/sales?date_to=2000-01-01')
+
+    assert response.json()['sales'] == []
+
+
+def test_backfill_matches_incremental_rollups(
+    auth_client, session, sample_client, sample_product
+):
+    create_order(auth_client, sample_client, sample_product, 2)
+    create_order(auth_client, sample_client, sample_product, 3)
+    auth_client.put('/orders/1', json={'status': 'canceled'})
+    fold(session)
+    incremental = auth_client.get('/reports/sales').json()
+
+    backfill(session, date_from=date(2000, 1, 1))
+
+    assert auth_client.get('/reports/sales').json() == incremental
+
+
+def test_orders_only_append_sales_events(
+    auth_client, session, sample_client, sample_product
+):
+    create_order(auth_client, sample_client, sample_product, 2)
+
+    assert session.scalar(select(func.count()).select_from(SalesEvent)) == 1
+    assert session.scalar(select(ProductDailySales)) is None
+
+    assert fold(session) == 1
+    assert session.scalar(select(func.count()).select_from(SalesEvent)) == 0
+    assert session.scalar(select(ProductDailySales.units)) == 2
+
+
+def test_cancelled_order_leaves_the_category_it_was_sold_in(
+    auth_client, session, sample_client, sample_product
+):
+    create_order(auth_client, sample_client, sample_product, 2)
+    sample_product.category = 'drinks'
+    session.commit()
+    auth_client.put('/orders/1', json={'status': 'canceled'})
+    fold(session)
+
+    response = auth_client.get('/reports/sales?group_by=category')
+
+    [row] = response.json()['sales']
+    assert row['category'] == 'groceries'
+    assert (row['revenue'], row['units'], row['orders']) == (0, 0, 0)
+
+
+def test_deleted_orders_leave_the_rollups(
+    admin_client, session, sample_product
+):
+    client = admin_client.post(
+        '/clients/',
+        json={
+            'name': 'Client',
+            'email': 'client@example.com',
+            'cpf': '529.982.247-25',
+        },
+    ).json()
+    create_order(admin_client, client, sample_product, 2)
+    create_order(admin_client, client, sample_product, 3)
+    admin_client.delete('/orders/1')
+    fold(session)
+    incremental = admin_client.get('/reports/sales').json()
+
+    backfill(session, date_from=date(2000, 1, 1))
+
+    assert incremental['sales'][0]['units'] == 3
+    assert admin_client.get('/reports/sales').json() == incremental
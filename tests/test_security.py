@@ -1,8 +1,17 @@
 from datetime import UTC, datetime, timedelta
 from http import HTTPStatus
 
-from jwt import encode
-
+from jwt import decode, encode
+from sqlalchemy import select
+
+from src.models.auth_model import User
+from src.services import security
+from src.services.principal_cache import (
+    Principal,
+    PrincipalCache,
+    principal_cache,
+)
+from src.services.security import create_access_token, token_claims
 from src.services.settings import Settings
 
 
@@ -72,3 +81,80 @@ def test_user_not_found(client):
 
     assert response.status_code == HTTPStatus.UNAUTHORIZED
     assert response.json()['detail'] == 'Could not validate credentials'
+
+
+def test_current_user_is_cached_between_requests(auth_client):
+    auth_client.get('/clients/')
+    misses = principal_cache.misses
+    auth_client.get('/clients/')
+
+    assert principal_cache.misses == misses
+    assert principal_cache.hits >= 1
+
+
+def test_user_update_invalidates_cached_principal(auth_client, session):
+    auth_client.get('/clients/')
+    user = session.scalar(
+        select(User).where(User.email == 'testuser@example.com')
+    )
+    user.name = 'Renamed User'
+    session.commit()
+
+    assert principal_cache.get('testuser@example.com') is None
+
+
+def test_principal_cache_evicts_least_recently_used():
+    cache = PrincipalCache(ttl=60, max_size=2)
+    for index in range(3):
+        cache.set(
+            f'user{index}@example.com',
+            Principal(index, 'user', f'user{index}@example.com', 'normal'),
+        )
+
+    assert cache.get('user0@example.com') is None
+    assert cache.get('user2@example.com').id == 2
+
+
+def test_principal_cache_expires_entries():
+    cache = PrincipalCache(ttl=0, max_size=2)
+    cache.set('user@example.com', Principal(1, 'user', 'user', 'normal'))
+
+    assert cache.get('user@example.com') is None
+
+
+def test_revoked_token_is_rejected(auth_client):
+    response = auth_client.post('/auth/revoke-tokens')
+    assert response.status_code == HTTPStatus.NO_CONTENT
+
+    response = auth_client.post('/auth/refresh-token')
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_stateless_token_authorizes_from_claims(client, monkeypatch):
+    monkeypatch.setattr(security.settings, 'JWT_STATELESS', True)
+    claims = token_claims(
+        Principal(42, 'Ghost Admin', 'ghost@example.com', 'admin')
+    )
+    token = create_access_token(claims)
+
+    response = client.delete(
+        '/clients/1', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    # authorized as admin without the user existing in the database
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json()['detail'] == 'Client not found'
+
+
+def test_stateless_token_revocation(auth_client, monkeypatch):
+    monkeypatch.setattr(security.settings, 'JWT_STATELESS', True)
+    token = auth_client.post('/auth/refresh-token').json()['access_token']
+    auth_client.headers = {'Authorization': f'Bearer {token}'}
+    assert 'uid' in decode(
+        token, Settings().SECRET_KEY, algorithms=[Settings().ALGORITHM]
+    )
+
+    auth_client.post('/auth/revoke-tokens')
+    response = auth_client.get('/clients/')
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED